@@ -3,8 +3,9 @@ from flask import Flask, request, abort, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_migrate import Migrate
-from auth import AuthError, requires_auth
-from models import setup_db, Actor, Movie
+from auth import AuthError, requires_auth, jwks_cache
+from models import setup_db, db_pool_metrics, Actor, Movie
+from metrics import Metrics
 
 db = SQLAlchemy()
 
@@ -14,6 +15,9 @@ def create_app(test_config=None):
     app = Flask(__name__)
     migrate = Migrate(app, db)
     setup_db(app)
+    jwks_cache.start_background_refresh()
+    metrics = Metrics(app)
+    metrics.add_collector(db_pool_metrics)
 
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
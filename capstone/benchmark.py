@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import time
+
+import rsa
+from jose import jwk, jwt
+
+# point auth at a local key set before it reads its configuration
+os.environ['AUTH0_DOMAIN'] = 'benchmark.auth0.com'
+os.environ['ALGORITHMS'] = 'RS256'
+os.environ['API_AUDIENCE'] = 'movie'
+
+import auth  # noqa: E402
+
+
+def make_token(kid='benchmark'):
+    public_key, private_key = rsa.newkeys(2048)
+    private_pem = private_key.save_pkcs1().decode('utf-8')
+    public_jwk = jwk.construct(public_key.save_pkcs1().decode('utf-8'), 'RS256').to_dict()
+    public_jwk.update({'kid': kid, 'use': 'sig'})
+
+    jwks_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+    json.dump({'keys': [public_jwk]}, jwks_file)
+    jwks_file.close()
+
+    claims = {
+        'iss': 'https://benchmark.auth0.com/',
+        'aud': 'movie',
+        'exp': int(time.time()) + 3600,
+        'permissions': ['get:movies']
+    }
+    token = jwt.encode(claims, private_pem, algorithm='RS256', headers={'kid': kid})
+    return token, jwks_file.name
+
+
+def bench_verify(token, iterations, cached):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if not cached:
+            auth.token_cache.clear()
+        auth.verify_decode_jwt(token)
+    return iterations / (time.perf_counter() - start)
+
+
+def main(iterations=2000):
+    token, jwks_path = make_token()
+    auth.jwks_cache.url = 'file://' + jwks_path
+    try:
+        uncached = bench_verify(token, iterations, cached=False)
+        cached = bench_verify(token, iterations, cached=True)
+    finally:
+        os.remove(jwks_path)
+
+    print(f'without token cache: {uncached:12.0f} verifications/s')
+    print(f'with token cache:    {cached:12.0f} verifications/s')
+    print(f'token cache: {auth.token_cache.stats()}  jwks cache: {auth.jwks_cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 import os
+import tempfile
+import time
 import unittest
 import json
 from flask_sqlalchemy import SQLAlchemy
 from app import create_app
+from auth import JWKSCache, VerifiedTokenCache
 from models import setup_db, Movie, Actor
 
 """ Permission list
@@ -347,6 +350,123 @@ class MoviesTestCase(unittest.TestCase):
         delete_test_movie()
 
 
+class JWKSCacheTestCase(unittest.TestCase):
+    """This class represents the JWKS key cache test case"""
+
+    def setUp(self):
+        self.jwks_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        self.jwks_file.close()
+        self.write_jwks('key-1')
+        self.url = 'file://' + self.jwks_file.name
+
+    def tearDown(self):
+        os.remove(self.jwks_file.name)
+
+    def write_jwks(self, *kids):
+        keys = [{'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': 'n-' + kid, 'e': 'AQAB'}
+                for kid in kids]
+        with open(self.jwks_file.name, 'w') as f:
+            json.dump({'keys': keys}, f)
+
+    def test_keys_are_fetched_once(self):
+        cache = JWKSCache(self.url, ttl=600)
+        for _ in range(5):
+            self.assertEqual(cache.get_key('key-1')['n'], 'n-key-1')
+        self.assertEqual(cache.stats(), {'hits': 5, 'misses': 0, 'refreshes': 1, 'keys': 1})
+
+    def test_expired_keys_are_refetched(self):
+        cache = JWKSCache(self.url, ttl=0, min_refresh_interval=0)
+        cache.get_key('key-1')
+        cache.get_key('key-1')
+        self.assertEqual(cache.refreshes, 2)
+
+    def test_failed_refresh_keeps_current_keys(self):
+        fetches = []
+
+        def fetch(url):
+            fetches.append(url)
+            if len(fetches) > 1:
+                raise OSError('key endpoint down')
+            with open(self.jwks_file.name) as f:
+                return json.load(f)
+
+        cache = JWKSCache(self.url, ttl=0, min_refresh_interval=600, fetch=fetch)
+        cache.get_key('key-1')
+        cache.expires_at = 0
+        cache.last_refresh -= 600
+        with self.assertLogs('auth', 'ERROR'):
+            self.assertEqual(cache.get_key('key-1')['kid'], 'key-1')
+        # the failure pushes the next attempt back instead of retrying per request
+        self.assertEqual(cache.get_key('key-1')['kid'], 'key-1')
+        self.assertEqual(len(fetches), 2)
+        self.assertEqual(cache.refreshes, 1)
+
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        cache = JWKSCache(self.url, ttl=600, min_refresh_interval=600)
+        cache.get_key('key-1')
+        self.write_jwks('key-1', 'key-2')
+        self.assertIsNone(cache.get_key('key-2'))
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.refreshes, 1)
+
+    def test_unknown_kid_picks_up_rotated_key(self):
+        cache = JWKSCache(self.url, ttl=600, min_refresh_interval=0)
+        cache.get_key('key-1')
+        self.write_jwks('key-2')
+        self.assertEqual(cache.get_key('key-2')['kid'], 'key-2')
+        self.assertIsNone(cache.get_key('key-1'))
+        self.assertEqual(cache.refreshes, 3)
+
+    def test_background_refresh_renews_keys(self):
+        cache = JWKSCache(self.url, ttl=0.2, min_refresh_interval=0)
+        cache.start_background_refresh(margin=0.5)
+        try:
+            time.sleep(0.5)
+        finally:
+            cache.stop_background_refresh()
+        self.assertGreaterEqual(cache.refreshes, 2)
+        self.assertEqual(cache.hits + cache.misses, 0)
+
+
+class VerifiedTokenCacheTestCase(unittest.TestCase):
+    """This class represents the verified token cache test case"""
+
+    def setUp(self):
+        self.jwks = JWKSCache('file:///dev/null')
+        self.jwks.keys = {'key-1': {'kid': 'key-1'}}
+        self.cache = VerifiedTokenCache(self.jwks, maxsize=2)
+        self.payload = {'exp': time.time() + 60, 'permissions': ['get:movies']}
+
+    def test_verified_payload_is_returned(self):
+        self.cache.set('token', self.payload, 'key-1')
+        self.assertEqual(self.cache.get('token'), self.payload)
+        self.assertIsNone(self.cache.get('other-token'))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_expired_token_is_dropped(self):
+        self.cache.set('token', {'exp': time.time() - 1}, 'key-1')
+        self.assertIsNone(self.cache.get('token'))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_token_without_exp_is_not_cached(self):
+        self.cache.set('token', {'permissions': []}, 'key-1')
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_rotated_key_drops_token(self):
+        self.cache.set('token', self.payload, 'key-1')
+        self.jwks.keys = {'key-2': {'kid': 'key-2'}}
+        self.assertIsNone(self.cache.get('token'))
+
+    def test_least_recently_used_token_is_evicted(self):
+        self.cache.set('token-1', self.payload, 'key-1')
+        self.cache.set('token-2', self.payload, 'key-1')
+        self.cache.get('token-1')
+        self.cache.set('token-3', self.payload, 'key-1')
+        self.assertIsNotNone(self.cache.get('token-1'))
+        self.assertIsNone(self.cache.get('token-2'))
+        self.assertIsNotNone(self.cache.get('token-3'))
+
+
 # Make the tests conveniently executable
 
 
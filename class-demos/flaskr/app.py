@@ -1,23 +1,83 @@
 import os
 import random
-from flask import Flask, jsonify, request, abort
+import time
+from flask import Flask, jsonify, request, abort, g
 from flask_cors import CORS, cross_origin
-from models import setup_db, Book
+from models import setup_db, db_pool_metrics, db, Book
+from metrics import Metrics
 
 BOOKS_PER_SHELF = 8
+BOOK_COUNT_TTL = 60
 
-def paginate_books(request, selection):
-	page = request.args.get('page', 1, type=int)
-	start = (page - 1) * BOOKS_PER_SHELF
-	end = start + BOOKS_PER_SHELF
+def paginate_books(request, query):
+	# one shelf of a query ordered by Book.id, fetched by the database:
+	# the books after ?after_id when given (keyset), otherwise ?page
+	# with LIMIT/OFFSET
+	after_id = request.args.get('after_id', type=int)
+	if after_id is not None:
+		query = query.filter(Book.id > after_id)
+	else:
+		page = request.args.get('page', 1, type=int)
+		if page < 1:
+			return []
+		query = query.offset((page - 1) * BOOKS_PER_SHELF)
 
-	formatted_books = [book.format() for book in selection]
-	return formatted_books[start:end]
+	return [book.format() for book in query.limit(BOOKS_PER_SHELF)]
+
+def count_books(query):
+	# count() of a query, run at most once per request
+	statement = query.statement.compile()
+	key = (str(statement), tuple(sorted(statement.params.items())))
+	counts = g.setdefault('book_counts', {})
+	if key not in counts:
+		counts[key] = query.order_by(None).count()
+	return counts[key]
+
+def update_ratings(ratings):
+	# apply an {id: rating} dict in a single UPDATE ... FROM (VALUES ...)
+	# statement and return the ids of the books that exist
+	if not ratings:
+		return set()
+
+	values = []
+	params = {}
+	for i, (book_id, rating) in enumerate(ratings.items()):
+		values.append('(:id{0}, :rating{0})'.format(i))
+		params['id{}'.format(i)] = book_id
+		params['rating{}'.format(i)] = rating
+
+	rows = db.session.execute(
+		'UPDATE books SET rating = new.rating FROM (VALUES {}) AS new (id, rating) '
+		'WHERE books.id = new.id RETURNING books.id'.format(', '.join(values)),
+		params
+	)
+	return {book_id for book_id, in rows}
+
+class BookCount:
+	""" Number of books, adjusted by this process's writes and recounted every `ttl` seconds """
+
+	def __init__(self, ttl=BOOK_COUNT_TTL):
+		self.ttl = ttl
+		self.value = None
+		self.expires_at = 0
+
+	def get(self):
+		if self.value is None or time.monotonic() >= self.expires_at:
+			self.value = Book.query.count()
+			self.expires_at = time.monotonic() + self.ttl
+		return self.value
+
+	def add(self, change):
+		if self.value is not None:
+			self.value += change
 
 def create_app(test_config=None):
 	app = Flask(__name__)
 	setup_db(app)
 	CORS(app)
+	metrics = Metrics(app)
+	metrics.add_collector(db_pool_metrics)
+	book_count = BookCount()
 
 	@app.after_request
 	def after_request(response):
@@ -27,8 +87,7 @@ def create_app(test_config=None):
 
 	@app.route('/books')
 	def get_books():
-		books = Book.query.order_by(Book.id).all()
-		current_books = paginate_books(request, books)
+		current_books = paginate_books(request, Book.query.order_by(Book.id))
 
 		if len(current_books) == 0:
 			abort(404)
@@ -36,7 +95,7 @@ def create_app(test_config=None):
 		return jsonify({
 			'success': True,
 			'books': current_books,
-			'total_books': len(books)
+			'total_books': book_count.get()
 		})
 
 	@app.route('/books/<int:book_id>')
@@ -70,6 +129,52 @@ def create_app(test_config=None):
 		except:
 			abort(400)
 
+	@app.route('/books', methods=['PATCH'])
+	def update_book_ratings():
+		# bulk rating update: a list of {id, rating}, applied in one statement
+		# and one transaction, with a status for every item in the order sent
+		body = request.get_json()
+		updates = body.get('books') if isinstance(body, dict) else body
+		if not isinstance(updates, list):
+			abort(400)
+
+		start = time.perf_counter()
+		parsed = []
+		for update in updates:
+			try:
+				parsed.append((int(update['id']), int(update['rating'])))
+			except (KeyError, TypeError, ValueError):
+				parsed.append((update.get('id') if isinstance(update, dict) else None, None))
+
+		try:
+			# for repeated ids the last rating wins
+			updated = update_ratings({book_id: rating for book_id, rating in parsed if rating is not None})
+			db.session.commit()
+		except:
+			db.session.rollback()
+			abort(422)
+		finally:
+			db.session.close()
+
+		results = []
+		for book_id, rating in parsed:
+			if rating is None:
+				status = 'invalid'
+			elif book_id in updated:
+				status = 'updated'
+			else:
+				status = 'not found'
+			results.append({'id': book_id, 'status': status})
+
+		seconds = time.perf_counter() - start
+		return jsonify({
+			'success': True,
+			'results': results,
+			'updated': len(updated),
+			'seconds': seconds,
+			'updates_per_second': len(updates) / seconds if seconds else 0
+		})
+
 	@app.route('/books/<int:book_id>', methods=['DELETE'])
 	def delete_book(book_id):
 		try:
@@ -79,13 +184,13 @@ def create_app(test_config=None):
 				abort(404)
 
 			book.delete()
-			books = Book.query.order_by(Book.id).all()
+			book_count.add(-1)
 
 			return jsonify({
 				'success': True,
-				'books': paginate_books(request, books),
+				'books': paginate_books(request, Book.query.order_by(Book.id)),
 				'deleted': book.id,
-				'total_books': len(books)
+				'total_books': book_count.get()
 			})
 
 		except:
@@ -101,24 +206,23 @@ def create_app(test_config=None):
 
 		try:
 			if search:
-				books = Book.query.order_by(Book.id).filter(Book.title.ilike('%{}%'.format(search))).all()
+				books = Book.query.order_by(Book.id).filter(Book.title.ilike('%{}%'.format(search)))
 				return jsonify({
 					'success': True,
 					'books': paginate_books(request, books),
-					'total_books': len(books)
+					'total_books': count_books(books)
 				})
 
 			else:
 				book = Book(title=title, author=author, rating=rating)
 				book.insert()
-
-				books = Book.query.order_by(Book.id).all()
+				book_count.add(1)
 
 				return jsonify({
 					'success': True,
-					'books': paginate_books(request, books),
+					'books': paginate_books(request, Book.query.order_by(Book.id)),
 					'created': book.id,
-					'total_books': len(books)
+					'total_books': book_count.get()
 				})
 		except:
 			abort(422)
@@ -0,0 +1,73 @@
+import os
+import time
+
+from flask import request
+
+from app import create_app, paginate_books, BOOKS_PER_SHELF
+from models import setup_db, db, Book
+
+# Compares the old paginate_books, which loaded and formatted every book
+# before slicing out a shelf, with the LIMIT/OFFSET and keyset pages it now
+# asks the database for. The benchmark fills and drops its own books table,
+# so never point it at the real bookshelf database:
+#
+#     BOOKSHELF_BENCHMARK_DATABASE_URL=postgresql://localhost:5432/bookshelf_benchmark python benchmark.py
+
+DATABASE_URL = os.environ.get('BOOKSHELF_BENCHMARK_DATABASE_URL',
+                              'postgresql://weiyuhuang@localhost:5432/bookshelf_benchmark')
+
+
+def paginate_loaded_books(request, selection):
+	# paginate_books before it took a query
+	page = request.args.get('page', 1, type=int)
+	start = (page - 1) * BOOKS_PER_SHELF
+	end = start + BOOKS_PER_SHELF
+
+	formatted_books = [book.format() for book in selection]
+	return formatted_books[start:end]
+
+
+def seed(num_books):
+	db.drop_all()
+	db.create_all()
+	db.session.execute(
+		"INSERT INTO books (title, author, rating) "
+		"SELECT 'Book ' || i, 'Author ' || (i % 1000), i % 5 + 1 FROM generate_series(1, :n) AS i",
+		{'n': num_books}
+	)
+	db.session.commit()
+
+
+def timed(app, url, fetch, repeat):
+	start = time.perf_counter()
+	for _ in range(repeat):
+		with app.test_request_context(url):
+			books = fetch(request)
+	assert len(books) == BOOKS_PER_SHELF
+	return (time.perf_counter() - start) / repeat
+
+
+def main(num_books=1000000):
+	app = create_app()
+	setup_db(app, DATABASE_URL)
+	with app.app_context():
+		seed(num_books)
+		last_page = num_books // BOOKS_PER_SHELF
+		ordered = lambda: Book.query.order_by(Book.id)
+
+		print('page        load all    offset    keyset')
+		for page in (1, last_page // 2, last_page):
+			after_id = (page - 1) * BOOKS_PER_SHELF
+			load_all = timed(app, f'/books?page={page}',
+							 lambda request: paginate_loaded_books(request, ordered().all()), 1)
+			offset = timed(app, f'/books?page={page}',
+						   lambda request: paginate_books(request, ordered()), 20)
+			keyset = timed(app, f'/books?after_id={after_id}',
+						   lambda request: paginate_books(request, ordered()), 20)
+			print(f'{page:7d}  {load_all:9.3f}s  {offset:7.4f}s  {keyset:7.4f}s')
+
+		db.drop_all()
+
+
+if __name__ == '__main__':
+	main()
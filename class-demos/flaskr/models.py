@@ -2,6 +2,7 @@ import os
 from sqlalchemy import Column, String, Integer, create_engine
 from flask_sqlalchemy import SQLAlchemy
 import json
+from dbpool import engine_options, pool_profile, pool_metrics
 
 database_name = "bookshelf"
 # database_path = "postgres://{}:{}@{}/{}".format('student', 'student', 'localhost:5432', database_name)
@@ -11,18 +12,30 @@ db = SQLAlchemy()
 
 '''
 setup_db(app)
-    binds a flask application and a SQLAlchemy service
+    binds a flask application and a SQLAlchemy service, with the connection
+    pool settings of `pool`, app.config or the environment (see dbpool)
 '''
 
 
-def setup_db(app, database_path=database_path):
+def setup_db(app, database_path=database_path, pool=None):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(pool_profile(app.config, pool))
     db.app = app
     db.init_app(app)
     db.create_all()
 
 
+'''
+db_pool_metrics()
+    Prometheus lines for the connection pool, for Metrics.add_collector
+'''
+
+
+def db_pool_metrics():
+    return pool_metrics(db.engine.pool)
+
+
 '''
 Movie
 
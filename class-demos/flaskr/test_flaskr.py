@@ -44,6 +44,15 @@ class BookTestCase(unittest.TestCase):
         self.assertTrue(data['total_books'])
         self.assertTrue(len(data['books']))
 
+    def test_get_books_after_id(self):
+        first_shelf = json.loads(self.client().get('/books').data)['books']
+        res = self.client().get('/books?after_id={}'.format(first_shelf[-1]['id']))
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['success'], True)
+        self.assertTrue(all(book['id'] > first_shelf[-1]['id'] for book in data['books']))
+
     def test_404_sent_requesting_beyond_valid_page(self):
         res = self.client().get('/books?page=1000', json={'rating': 1})
         data = json.loads(res.data)
@@ -63,6 +72,40 @@ class BookTestCase(unittest.TestCase):
 
         self.client().delete('/books/{}'.format(data['created']))
 
+    def test_write_keeps_total_books(self):
+        total = json.loads(self.client().get('/books').data)['total_books']
+
+        res = self.client().post('/books', json=self.new_book)
+        created = json.loads(res.data)
+        self.assertEqual(created['total_books'], total + 1)
+
+        res = self.client().delete('/books/{}'.format(created['created']))
+        deleted = json.loads(res.data)
+        self.assertEqual(deleted['total_books'], total)
+
+    def test_bulk_update_book_ratings(self):
+        book = json.loads(self.client().get('/books').data)['books'][0]
+        res = self.client().patch('/books', json=[
+            {'id': book['id'], 'rating': 1},
+            {'id': 999999, 'rating': 2},
+            {'id': book['id']}
+        ])
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['success'], True)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual([result['status'] for result in data['results']],
+                         ['updated', 'not found', 'invalid'])
+        self.assertEqual(json.loads(self.client().get('/books/{}'.format(book['id'])).data)['book']['rating'], 1)
+
+    def test_400_bulk_update_without_list(self):
+        res = self.client().patch('/books', json={'rating': 1})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+
     def test_405_if_book_creation_not_allowed(self):
         res = self.client().post('/books/45', json=self.new_book)
         data = json.loads(res.data)
@@ -89,6 +132,16 @@ class BookTestCase(unittest.TestCase):
         self.assertEqual(data['total_books'], 0)
         self.assertEqual(len(data['books']), 0)
 
+    def test_metrics(self):
+        self.client().get('/books')
+        res = self.client().get('/metrics')
+        body = res.data.decode('utf-8')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('flask_requests_total{endpoint="get_books"} 1', body)
+        self.assertIn('flask_response_bytes_total{endpoint="get_books"}', body)
+        self.assertIn('flask_db_pool_size', body)
+
 # Make the tests conveniently executable
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
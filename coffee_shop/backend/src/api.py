@@ -1,18 +1,25 @@
 import os
-from flask import Flask, request, jsonify, abort
+import hashlib
+from flask import Flask, Response, request, jsonify, abort
 from sqlalchemy import exc
 import json
 from flask_cors import CORS
 
 from .database.models import db_drop_and_create_all, setup_db, Drink
-from .auth.auth import AuthError, requires_auth
+from .auth.auth import AuthError, requires_auth, jwks_cache
+from .metrics import Metrics
 
 app = Flask(__name__)
 setup_db(app)
 CORS(app)
+Metrics(app)
+jwks_cache.start_background_refresh()
 
 db_drop_and_create_all()
 
+# serialized GET /drinks response, rebuilt when Drink.version moves on
+drinks_cache = {'version': None, 'body': None, 'etag': None}
+
 # Route
 
 
@@ -25,12 +32,23 @@ def get_drinks():
         returns status code 200 and json {"success": True, "drinks": drinks}
             where drinks is the list of drinks
         or appropriate status code indicating reason for failure
+        the body is served from memory until a drink is written, and
+        requests whose If-None-Match matches its ETag get a 304
     """
-    drinks = Drink.query.all()
-    return jsonify({
-        'success': True,
-        'drinks': [drink.short() for drink in drinks]
-    }), 200
+    if drinks_cache['version'] != Drink.version:
+        # read the version first so a write during the query forces a rebuild
+        version = Drink.version
+        drinks = Drink.query.all()
+        body = json.dumps({
+            'success': True,
+            'drinks': [drink.short() for drink in drinks]
+        }).encode('utf-8')
+        drinks_cache.update(version=version, body=body,
+                            etag=hashlib.sha1(body).hexdigest())
+
+    response = Response(drinks_cache['body'], status=200, mimetype='application/json')
+    response.set_etag(drinks_cache['etag'])
+    return response.make_conditional(request)
 
 
 @app.route('/drinks-detail')
@@ -72,7 +90,7 @@ def add_drinks(token):
 
         drink = Drink()
         drink.title = req['title']
-        drink.recipe = json.dumps(req_recipe)  # convert object to a string
+        drink.recipe = req_recipe
         drink.insert()
 
     except BaseException:
@@ -108,7 +126,7 @@ def patch_drinks(token, drink_id):
         if 'title' in new_drink_data:
             setattr(drink_data, 'title', new_drink_data['title'])
         if 'recipe' in new_drink_data:
-            setattr(drink_data, 'recipe', json.dumps(new_drink_data['recipe']))
+            setattr(drink_data, 'recipe', new_drink_data['recipe'])
         Drink.update(drink_data)
     except BaseException:
         abort(400)
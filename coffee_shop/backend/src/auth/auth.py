@@ -1,4 +1,9 @@
+import hashlib
 import json
+import logging
+import threading
+import time
+from collections import OrderedDict
 from flask import request, _request_ctx_stack
 from functools import wraps
 from jose import jwt
@@ -7,6 +12,13 @@ from urllib.request import urlopen
 AUTH0_DOMAIN = 'glistter.auth0.com'
 ALGORITHMS = ['RS256']
 API_AUDIENCE = 'coffee'
+JWKS_URL = f'https://{AUTH0_DOMAIN}/.well-known/jwks.json'
+JWKS_CACHE_TTL = 600
+JWKS_MIN_REFRESH_INTERVAL = 30
+JWKS_FETCH_TIMEOUT = 5
+TOKEN_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
 
 
 # AuthError Exception
@@ -62,26 +74,205 @@ def check_permissions(permission, payload):
     return True
 
 
+def fetch_jwks(url):
+    jsonurl = urlopen(url, timeout=JWKS_FETCH_TIMEOUT)
+    return json.loads(jsonurl.read())
+
+
+class JWKSCache:
+    '''
+    Process-wide cache of the signing keys published at a JWKS url
+
+    Keys are parsed once into a dict keyed by kid and kept for `ttl` seconds.
+    Expired keys and unknown kids trigger a refetch, one at a time and at
+    most every `min_refresh_interval` seconds, so a stream of forged tokens
+    cannot hammer the key endpoint. When a refetch fails the current keys
+    are kept and the next attempt waits `min_refresh_interval` seconds.
+    `fetch` can be replaced to load keys from somewhere other than urlopen;
+    a file:// url already works for a local JWKS file.
+    '''
+
+    def __init__(self, url, ttl=JWKS_CACHE_TTL,
+                 min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL, fetch=fetch_jwks):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.fetch = fetch
+        self.keys = {}
+        self.expires_at = 0
+        self.last_refresh = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        self.last_refresh = time.monotonic()
+        jwks = self.fetch(self.url)
+        keys = {}
+        for key in jwks['keys']:
+            keys[key['kid']] = {
+                'kty': key['kty'],
+                'kid': key['kid'],
+                'use': key['use'],
+                'n': key['n'],
+                'e': key['e']
+            }
+        self.keys = keys
+        self.expires_at = time.monotonic() + self.ttl
+        self.refreshes += 1
+
+    def _refresh_due(self):
+        return (self.last_refresh is None or
+                time.monotonic() - self.last_refresh >= self.min_refresh_interval)
+
+    def _refresh_if(self, needed):
+        # the first request to get the lock refetches; the ones queued behind
+        # it find the keys already renewed
+        with self._lock:
+            if not needed() or not self._refresh_due():
+                return
+            try:
+                self._refresh()
+            except Exception:
+                logger.exception('Unable to refresh JWKS from %s', self.url)
+                self.expires_at = time.monotonic() + self.min_refresh_interval
+
+    def get_key(self, kid):
+        if time.monotonic() >= self.expires_at:
+            self._refresh_if(lambda: time.monotonic() >= self.expires_at)
+
+        rsa_key = self.keys.get(kid)
+        if rsa_key:
+            self.hits += 1
+            return rsa_key
+
+        self.misses += 1
+        self._refresh_if(lambda: kid not in self.keys)
+        return self.keys.get(kid)
+
+    def start_background_refresh(self, margin=0.1):
+        '''
+        Renew the keys in a daemon thread once `margin` of the ttl is left,
+        so requests never wait on the key endpoint. Safe to call repeatedly.
+        '''
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, args=(margin,),
+                                        name='jwks-refresh', daemon=True)
+        self._thread.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self, margin):
+        while True:
+            wait = self.expires_at - time.monotonic() - self.ttl * margin
+            if self._stop.wait(max(wait, 0)):
+                return
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Unable to refresh JWKS from %s', self.url)
+                if self._stop.wait(self.min_refresh_interval):
+                    return
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'keys': len(self.keys)
+        }
+
+
+jwks_cache = JWKSCache(JWKS_URL)
+
+
+class VerifiedTokenCache:
+    '''
+    Bounded LRU cache of payloads that already passed signature verification
+
+    Entries are keyed by a sha256 of the token, so raw tokens are never held
+    in memory, and are dropped once the token's exp claim has passed or the
+    key that signed it is no longer in the JWKS key set.
+    '''
+
+    def __init__(self, jwks, maxsize=TOKEN_CACHE_SIZE):
+        self.jwks = jwks
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        digest = self._digest(token)
+        with self._lock:
+            entry = self.entries.get(digest)
+            if entry is not None:
+                payload, exp, kid = entry
+                if exp > time.time() and kid in self.jwks.keys:
+                    self.entries.move_to_end(digest)
+                    self.hits += 1
+                    return payload
+                del self.entries[digest]
+            self.misses += 1
+            return None
+
+    def set(self, token, payload, kid):
+        # tokens without an expiry are never cached
+        if self.maxsize <= 0 or 'exp' not in payload:
+            return
+        digest = self._digest(token)
+        with self._lock:
+            self.entries[digest] = (payload, payload['exp'], kid)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries)
+        }
+
+
+token_cache = VerifiedTokenCache(jwks_cache)
+
+
 def verify_decode_jwt(token):
-    jsonurl = urlopen(f'https://{AUTH0_DOMAIN}/.well-known/jwks.json')
-    jwks = json.loads(jsonurl.read())
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
     if 'kid' not in unverified_header:
         raise AuthError({
             'code': 'invalid_header',
             'description': 'Authorization malformed.'
         }, 401)
 
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
+    rsa_key = jwks_cache.get_key(unverified_header['kid'])
     if rsa_key:
         try:
             payload = jwt.decode(
@@ -91,6 +282,7 @@ def verify_decode_jwt(token):
                 audience=API_AUDIENCE,
                 issuer='https://' + AUTH0_DOMAIN + '/'
             )
+            token_cache.set(token, payload, rsa_key['kid'])
             return payload
 
         except jwt.ExpiredSignatureError:
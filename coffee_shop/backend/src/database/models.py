@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, JSON, event
 from flask_sqlalchemy import SQLAlchemy
 import json
 
@@ -38,33 +38,52 @@ class Drink(db.Model):
     id = Column(Integer().with_variant(Integer, "sqlite"), primary_key=True)
     # String Title
     title = Column(String(80), unique=True)
-    # the ingredients blob - this stores a lazy json blob
+    # the ingredients - a native json column, decoded once when the row is loaded
     # the required datatype is [{'color': string, 'name':string, 'parts':number}]
-    recipe =  Column(String(180), nullable=False)
+    recipe = Column(JSON, nullable=False)
+
+    # cached representations, cleared whenever the title or recipe changes
+    _short = None
+    _long = None
+
+    # bumped by every insert, update and delete so that caches of the
+    # drink list can tell they are stale
+    version = 0
 
     '''
     short()
         short form representation of the Drink model
     '''
     def short(self):
-        print(json.loads(self.recipe))
-        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(self.recipe)]
-        return {
-            'id': self.id,
-            'title': self.title,
-            'recipe': short_recipe
-        }
+        if self._short is None:
+            short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in self.recipe]
+            self._short = {
+                'id': self.id,
+                'title': self.title,
+                'recipe': short_recipe
+            }
+        return self._short
 
     '''
     long()
         long form representation of the Drink model
     '''
     def long(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'recipe': json.loads(self.recipe)
-        }
+        if self._long is None:
+            self._long = {
+                'id': self.id,
+                'title': self.title,
+                'recipe': self.recipe
+            }
+        return self._long
+
+    '''
+    clear_cache()
+        drops the cached short() and long() representations
+    '''
+    def clear_cache(self):
+        self._short = None
+        self._long = None
 
     '''
     insert()
@@ -78,6 +97,7 @@ class Drink(db.Model):
     def insert(self):
         db.session.add(self)
         db.session.commit()
+        Drink.version += 1
 
     '''
     delete()
@@ -90,6 +110,7 @@ class Drink(db.Model):
     def delete(self):
         db.session.delete(self)
         db.session.commit()
+        Drink.version += 1
 
     '''
     update()
@@ -102,6 +123,14 @@ class Drink(db.Model):
     '''
     def update(self):
         db.session.commit()
+        self.clear_cache()
+        Drink.version += 1
 
     def __repr__(self):
-        return json.dumps(self.short())
\ No newline at end of file
+        return json.dumps(self.short())
+
+
+@event.listens_for(Drink.title, 'set')
+@event.listens_for(Drink.recipe, 'set')
+def drink_changed(target, value, oldvalue, initiator):
+    target.clear_cache()
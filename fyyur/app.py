@@ -2,17 +2,31 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
+import csv
+import io
 import json
+import functools
+import string
+import time
 import dateutil.parser
 import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
+import babel.dates
+import click
+from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort, jsonify, \
+    stream_with_context
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import ARRAY
 import logging
-from logging import Formatter, FileHandler
+from logging import Formatter
 from flask_wtf import Form
 from forms import *
 from flask_migrate import Migrate
+from search import TrigramIndex, search_by_name, SEARCH_RESULTS_LIMIT
+from facets import GenreCounts
+from logqueue import start_queue_logging
+from metrics import Metrics
 
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -23,6 +37,9 @@ moment = Moment(app)
 app.config.from_object('config')
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
+metrics = Metrics(app)
+
+SHOWS_PER_PAGE = 30
 
 
 # ----------------------------------------------------------------------------#
@@ -31,6 +48,10 @@ migrate = Migrate(app, db)
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_Venue_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -40,20 +61,30 @@ class Venue(db.Model):
     phone = db.Column(db.String(120))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     shows = db.relationship('Show', backref='venue', lazy=True)
 
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_Artist_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Artist_name_id', 'name', 'id'),
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column("genres", db.ARRAY(db.String()), nullable=False)
+    genres = db.Column("genres", ARRAY(db.String()), nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     shows = db.relationship('Show', backref='artist', lazy=True)
 
 
@@ -64,24 +95,249 @@ class Show(db.Model):
     time = db.Column(db.DateTime, nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
+    # whether the show is counted in the upcoming_shows_count of its venue
+    # and artist; cleared by roll_show_counters once the show has started
+    counted_upcoming = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_time', 'venue_id', 'time'),
+        db.Index('ix_Show_artist_id_time', 'artist_id', 'time'),
+        db.Index('ix_Show_time', 'time'),
+        db.Index('ix_Show_counted_upcoming_time', 'time',
+                 postgresql_where=counted_upcoming),
+    )
+
+
+# name search fallbacks for databases without pg_trgm
+venue_name_index = TrigramIndex(Venue)
+artist_name_index = TrigramIndex(Artist)
+
+# genre counts for the artist directory sidebar
+artist_genre_counts = GenreCounts(Artist)
+
+
+# ----------------------------------------------------------------------------#
+# Show counters.
+#
+# Venue and Artist carry upcoming and past show counts so that listings do
+# not count shows on every request. Adding or deleting a show adjusts them
+# straight away; roll_show_counters moves shows that have started from the
+# upcoming to the past counts, and rebuild_show_counters recomputes all of
+# them from the Show table.
+# ----------------------------------------------------------------------------#
+
+def change_show_counters(connection, show, delta):
+    column = 'upcoming_shows_count' if show.counted_upcoming else 'past_shows_count'
+    for table, owner_id in ((Venue.__table__, show.venue_id),
+                            (Artist.__table__, show.artist_id)):
+        connection.execute(table.update().where(table.c.id == owner_id).
+                           values({column: table.c[column] + delta}))
+
+
+@event.listens_for(Show, 'before_insert')
+def mark_upcoming_show(mapper, connection, show):
+    show.counted_upcoming = show.time > datetime.now()
+
+
+@event.listens_for(Show, 'after_insert')
+def count_inserted_show(mapper, connection, show):
+    change_show_counters(connection, show, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def count_deleted_show(mapper, connection, show):
+    change_show_counters(connection, show, -1)
+
+
+def adjust_show_counters(shows, upcoming_change, past_change):
+    # add the changes once per show to the counters of its venue and artist,
+    # given (venue_id, artist_id) pairs; one executemany per table, in id
+    # order so concurrent writers lock the rows in the same order
+    if not shows:
+        return
+    for table, position in ((Venue.__table__, 0), (Artist.__table__, 1)):
+        shows_per_owner = {}
+        for show in shows:
+            shows_per_owner[show[position]] = shows_per_owner.get(show[position], 0) + 1
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('owner_id')).values(
+                upcoming_shows_count=table.c.upcoming_shows_count + db.bindparam('upcoming_change'),
+                past_shows_count=table.c.past_shows_count + db.bindparam('past_change')),
+            [{'owner_id': owner_id,
+              'upcoming_change': count * upcoming_change,
+              'past_change': count * past_change}
+             for owner_id, count in sorted(shows_per_owner.items())]
+        )
+
+
+def roll_show_counters(current_time):
+    # the started shows are locked while they are moved, and rows another
+    # worker has already locked are skipped, so concurrent runs never move
+    # the same show twice
+    started = db.session.query(Show.id, Show.venue_id, Show.artist_id).\
+        filter(Show.counted_upcoming, Show.time <= current_time).\
+        with_for_update(skip_locked=True).all()
+    if not started:
+        db.session.commit()
+        return 0
+
+    adjust_show_counters([(show.venue_id, show.artist_id) for show in started], -1, 1)
+    db.session.query(Show).filter(Show.id.in_([show.id for show in started])).\
+        update({Show.counted_upcoming: False}, synchronize_session=False)
+    db.session.commit()
+    return len(started)
+
+
+def rebuild_show_counters(current_time):
+    db.session.query(Show).update({Show.counted_upcoming: Show.time > current_time},
+                                  synchronize_session=False)
+    for model, owner_id in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        counts = {}
+        for upcoming, column in ((True, model.upcoming_shows_count),
+                                 (False, model.past_shows_count)):
+            counts[column] = db.session.query(db.func.count(Show.id)).filter(
+                owner_id == model.id,
+                Show.counted_upcoming if upcoming else db.not_(Show.counted_upcoming)
+            ).as_scalar()
+        db.session.query(model).update(counts, synchronize_session=False)
+    db.session.commit()
+
+
+last_counter_roll = {'at': 0.0}
+
+
+@app.before_request
+def roll_due_show_counters():
+    # keeps the counters current without a scheduler; set
+    # SHOW_COUNTERS_ROLL_INTERVAL to 0 when `flask roll-show-counters` runs
+    # from cron instead
+    interval = app.config['SHOW_COUNTERS_ROLL_INTERVAL']
+    if not interval or time.monotonic() - last_counter_roll['at'] < interval:
+        return
+    last_counter_roll['at'] = time.monotonic()
+    try:
+        roll_show_counters(datetime.now())
+    except Exception:
+        db.session.rollback()
+        app.logger.exception('rolling show counters failed')
+
+
+@app.cli.command('roll-show-counters')
+def roll_show_counters_command():
+    """Move shows that have started from the upcoming to the past counts."""
+    moved = roll_show_counters(datetime.now())
+    print(f'{moved} shows moved to past')
+
+
+@app.cli.command('rebuild-show-counters')
+def rebuild_show_counters_command():
+    """Recompute every venue and artist show count from the Show table."""
+    rebuild_show_counters(datetime.now())
+    print('show counters rebuilt')
 
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma"
+}
+
+# Babel's names for the locale's own formats
+LOCALE_DATETIME_FORMATS = ('short', 'medium', 'long', 'full')
+
+
+@functools.lru_cache(maxsize=64)
+def compile_datetime_format(format, locale):
+    # parsing a Babel pattern and a locale is most of the cost of formatting
+    # a date, so each (format, locale) pair is only parsed once; the locale's
+    # named formats are left to Babel (None), which combines them itself
+    locale = babel.Locale.parse(locale)
+    if format not in DATETIME_FORMATS and format in LOCALE_DATETIME_FORMATS:
+        return None, locale
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format)), locale
+
+
+def format_datetime(value, format='medium', locale=None):
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    pattern, locale = compile_datetime_format(format, locale or babel.dates.LC_TIME)
+    if pattern is None:
+        return babel.dates.format_datetime(value, format, locale=locale)
+    return pattern.apply(value, locale)
 
 
 app.jinja_env.filters['datetime'] = format_datetime
 
 
+# ----------------------------------------------------------------------------#
+# Show queries.
+# ----------------------------------------------------------------------------#
+
+def shows_subquery(owner_id_column, owner_id, partner):
+    # the shows of one venue or artist joined to the other side (`partner`),
+    # numbered soonest first among upcoming shows and most recent first
+    # among past shows; upcoming follows the show counters so that the
+    # lists always agree with the counts shown above them
+    partner_id = Show.artist_id if partner is Artist else Show.venue_id
+    upcoming = Show.counted_upcoming.label('upcoming')
+    return db.session.query(
+        partner_id.label('partner_id'),
+        partner.name.label('partner_name'),
+        partner.image_link.label('partner_image_link'),
+        Show.time,
+        upcoming,
+        db.func.row_number().over(partition_by=upcoming,
+                                  order_by=(Show.time, Show.id)).label('upcoming_position'),
+        db.func.row_number().over(partition_by=upcoming,
+                                  order_by=(db.desc(Show.time), db.desc(Show.id))).label('past_position')
+    ).join(partner, partner_id == partner.id).filter(owner_id_column == owner_id).subquery()
+
+
+def split_shows(rows, prefix):
+    # partition joined show rows into past (most recent first) and upcoming
+    # show data
+    shows = {True: [], False: []}
+    for row in rows:
+        if row.time is None:
+            continue
+        shows[row.upcoming].append({
+            prefix + "_id": row.partner_id,
+            prefix + "_name": row.partner_name,
+            prefix + "_image_link": row.partner_image_link,
+            "start_time": row.time
+        })
+    shows[False].reverse()
+    return shows[False], shows[True]
+
+
+def past_shows_page(owner_id_column, owner_id, partner, prefix):
+    # one "load more" page of past shows, after the ones the detail page shows
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', app.config['PAST_SHOWS_LIMIT'], type=int), 1), 100)
+    partner_id = Show.artist_id if partner is Artist else Show.venue_id
+    rows = db.session.query(
+        partner_id,
+        partner.name,
+        partner.image_link,
+        Show.time
+    ).join(partner, partner_id == partner.id).\
+        filter(owner_id_column == owner_id, db.not_(Show.counted_upcoming)).\
+        order_by(db.desc(Show.time), db.desc(Show.id)).offset(offset).limit(limit + 1).all()
+
+    return jsonify({
+        "shows": [{
+            prefix + "_id": id,
+            prefix + "_name": name,
+            prefix + "_image_link": image_link,
+            "start_time": format_datetime(time, 'full')
+        } for id, name, image_link, time in rows[:limit]],
+        "has_more": len(rows) > limit
+    })
+
+
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
@@ -96,67 +352,84 @@ def index():
 
 @app.route('/venues')
 def venues():
-    data = []
-    venues = Venue.query.all()
-    locations = set()
-
-    for venue in venues:
-        locations.add((venue.city, venue.state))
+    return render_template('pages/venues.html', areas=get_venue_areas())
+
+
+def get_venue_areas():
+    # every venue with its upcoming show counter, ordered so that the
+    # venues of an area come out together
+    rows = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ).order_by(Venue.state, Venue.city, Venue.name).all()
+
+    areas = {}
+    for row in rows:
+        location = (row.city, row.state)
+        if location not in areas:
+            areas[location] = {"city": row.city,
+                               "state": row.state,
+                               "venues": []}
+        areas[location]['venues'].append({
+            "id": row.id,
+            "name": row.name,
+            "num_upcoming_shows": row.num_upcoming_shows
+        })
 
-    for location in locations:
-        data.append({"city": location[0],
-                     "state": location[1],
-                     "venues": []})
+    return list(areas.values())
 
-    for venue in venues:
-        shows = Show.query.filter_by(venue_id=venue.id).all()
-        num_upcoming_shows = 0
-        current_time = datetime.now()
-        for show in shows:
-            if show.time > current_time:
-                num_upcoming_shows += 1
 
-        for venue_location in data:
-            if venue.city == venue_location['city'] and venue.state == venue_location['state']:
-                venue_location['venues'].append({
-                    "id": venue.id,
-                    "name": venue.name,
-                    "num_upcoming_shows": num_upcoming_shows
-                })
+def search_pages(count, page):
+    # the range of results on `page` and its neighbours, for the search pager
+    first = (page - 1) * SEARCH_RESULTS_LIMIT
+    last_page = -(-count // SEARCH_RESULTS_LIMIT)
+    return {
+        "first_result": first + 1,
+        "last_result": min(first + SEARCH_RESULTS_LIMIT, count),
+        "prev_page": min(page - 1, last_page) or None,
+        "next_page": page + 1 if page < last_page else None
+    }
 
-    return render_template('pages/venues.html', areas=data)
 
-@app.route('/venues/search', methods=['POST'])
+@app.route('/venues/search', methods=['GET', 'POST'])
 def search_venues():
-    search_term = request.form.get('search_term', '')
-    result = Venue.query.filter(Venue.name.ilike(f'%{search_term}%'))
+    # the search box posts the term; the pager links carry it and the page
+    search_term = request.values.get('search_term', '')
+    page = max(request.values.get('page', 1, type=int), 1)
+    count, data = search_by_name(db.session, Venue, search_term, venue_name_index, page)
 
     response = {
-        "count": result.count(),
-        "data": result
+        "count": count,
+        "data": data
     }
-    return render_template('pages/search_venues.html', results=response, search_term=search_term)
+    return render_template('pages/search_venues.html', results=response, search_term=search_term,
+                           **search_pages(count, page))
 
 
 @app.route('/venues/<int:venue_id>')
 def show_venue(venue_id):
-    venue = Venue.query.get(venue_id)
-    shows = Show.query.filter_by(venue_id=venue_id).all()
-    past_shows = []
-    upcoming_shows = []
-    current_time = datetime.now()
-
-    for show in shows:
-        show_data = {
-            "artist_id": show.artist_id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": format_datetime(str(show.time))
-        }
-        if show.time > current_time:
-            upcoming_shows.append(show_data)
-        else:
-            past_shows.append(show_data)
+    # the venue and its shows in one round trip, capped to the most recent
+    # PAST_SHOWS_LIMIT past shows
+    shows = shows_subquery(Show.venue_id, venue_id, Artist)
+    rows = db.session.query(
+        Venue,
+        shows.c.partner_id,
+        shows.c.partner_name,
+        shows.c.partner_image_link,
+        shows.c.time,
+        shows.c.upcoming
+    ).outerjoin(
+        shows, db.or_(shows.c.upcoming, shows.c.past_position <= app.config['PAST_SHOWS_LIMIT'])
+    ).filter(Venue.id == venue_id).order_by(shows.c.time).all()
+
+    if not rows:
+        abort(404)
+
+    venue = rows[0].Venue
+    past_shows, upcoming_shows = split_shows(rows, 'artist')
 
     data = {
         "id": venue.id,
@@ -169,13 +442,18 @@ def show_venue(venue_id):
         "facebook_link": venue.facebook_link,
         "past_shows": past_shows,
         "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcoming_shows)
+        "past_shows_count": venue.past_shows_count,
+        "upcoming_shows_count": venue.upcoming_shows_count
     }
 
     return render_template('pages/show_venue.html', venue=data)
 
 
+@app.route('/venues/<int:venue_id>/past_shows')
+def show_venue_past_shows(venue_id):
+    return past_shows_page(Show.venue_id, venue_id, Artist, 'artist')
+
+
 #  Create Venue
 #  ----------------------------------------------------------------
 
@@ -226,50 +504,122 @@ def delete_venue(venue_id):
 #  ----------------------------------------------------------------
 @app.route('/artists')
 def artists():
-    data = []
+    # one page of the artist directory in name order, paged by the (name, id)
+    # of the last artist shown rather than by offset, so that every page is
+    # an index range scan. ?genre= narrows it to artists listing all of the
+    # given genres, or any of them with ?match=any
+    per_page = app.config['ARTISTS_PER_PAGE']
+    after_id = request.args.get('after_id', type=int)
+    before_id = request.args.get('before_id', type=int)
+    start = request.args.get('from', '')
+    genres = request.args.getlist('genre')
+    match = 'any' if request.args.get('match') == 'any' else 'all'
+    filters = {"genre": genres, "match": match} if genres else {}
+
+    query = db.session.query(Artist.id, Artist.name)
+    if genres:
+        query = query.filter(Artist.genres.overlap(genres) if match == 'any'
+                             else Artist.genres.contains(genres))
+    if before_id is not None:
+        query = query.filter(db.tuple_(Artist.name, Artist.id) <
+                             (request.args.get('before', ''), before_id)).\
+            order_by(db.desc(Artist.name), db.desc(Artist.id))
+    else:
+        if after_id is not None:
+            query = query.filter(db.tuple_(Artist.name, Artist.id) >
+                                 (request.args.get('after', ''), after_id))
+        elif start:
+            query = query.filter(Artist.name >= start)
+        query = query.order_by(Artist.name, Artist.id)
+    rows = query.limit(per_page + 1).all()
+
+    # the extra row only tells whether there is another page that way
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before_id is not None:
+        rows.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = after_id is not None or bool(start), more
+
+    data = [{"id": id, "name": name} for id, name in rows]
+    context = {
+        "artists": data,
+        "letters": string.ascii_uppercase,
+        "filters": filters,
+        "genres": [{
+            "genre": genre,
+            "count": count,
+            "selected": genre in genres,
+            # the genres selected after clicking this one
+            "toggle": [g for g in genres if g != genre] if genre in genres else genres + [genre]
+        } for genre, count in artist_genre_counts.get(db.session)],
+        "match": match,
+        "prev_page": dict(filters, before=data[0]["name"], before_id=data[0]["id"])
+        if has_prev and data else None,
+        "next_page": dict(filters, after=data[-1]["name"], after_id=data[-1]["id"])
+        if has_next and data else None
+    }
+    if app.config['STREAM_ARTISTS']:
+        return Response(stream_with_context(stream_template('pages/artists.html', **context)))
+    return render_template('pages/artists.html', **context)
 
-    artists = Artist.query.all()
 
-    for artist in artists:
-        data.append({
-            "id": artist.id,
-            "name": artist.name
-        })
-    return render_template('pages/artists.html', artists=data)
+def stream_template(template_name, **context):
+    # renders a template in chunks as it is iterated, so the response can
+    # start before the whole page is built
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(20)
+    return stream
 
 
-@app.route('/artists/search', methods=['POST'])
+@app.route('/artists/search', methods=['GET', 'POST'])
 def search_artists():
-    search_term = request.form.get('search_term', '')
-    result = Artist.query.filter(Artist.name.ilike(f'%{search_term}%'))
+    search_term = request.values.get('search_term', '')
+    page = max(request.values.get('page', 1, type=int), 1)
+    count, data = search_by_name(db.session, Artist, search_term, artist_name_index, page)
 
     response = {
-        "count": result.count(),
-        "data": result
+        "count": count,
+        "data": data
     }
-    return render_template('pages/search_artists.html', results=response,
-                           search_term=request.form.get('search_term', ''))
+    return render_template('pages/search_artists.html', results=response, search_term=search_term,
+                           **search_pages(count, page))
 
 
 @app.route('/artists/<int:artist_id>')
 def show_artist(artist_id):
-    artist = Artist.query.get(artist_id)
-    shows = Show.query.filter_by(artist_id=artist_id).all()
-    past_shows = []
-    upcoming_shows = []
-    current_time = datetime.now()
-
-    for show in shows:
-        show_data = {
-            "venue_id": show.venue_id,
-            "venue_name": show.venue.name,
-            "venue_image_link": show.venue.image_link,
-            "start_time": format_datetime(str(show.time))
-        }
-        if show.time > current_time:
-            upcoming_shows.append(show_data)
-        else:
-            past_shows.append(show_data)
+    # the artist with one page of upcoming shows and the most recent
+    # PAST_SHOWS_LIMIT past shows, in one round trip
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = app.config['UPCOMING_SHOWS_PER_PAGE']
+    first = (page - 1) * per_page
+
+    shows = shows_subquery(Show.artist_id, artist_id, Venue)
+    rows = db.session.query(
+        Artist,
+        shows.c.partner_id,
+        shows.c.partner_name,
+        shows.c.partner_image_link,
+        shows.c.time,
+        shows.c.upcoming
+    ).outerjoin(
+        shows, db.or_(
+            db.and_(shows.c.upcoming,
+                    shows.c.upcoming_position > first,
+                    shows.c.upcoming_position <= first + per_page),
+            db.and_(db.not_(shows.c.upcoming),
+                    shows.c.past_position <= app.config['PAST_SHOWS_LIMIT']))
+    ).filter(Artist.id == artist_id).order_by(shows.c.time).all()
+
+    if not rows:
+        abort(404)
+
+    artist = rows[0].Artist
+    past_shows, upcoming_shows = split_shows(rows, 'venue')
+    if page > 1 and not upcoming_shows:
+        abort(404)
 
     data = {
         "id": artist.id,
@@ -282,11 +632,18 @@ def show_artist(artist_id):
         "facebook_link": artist.facebook_link,
         "past_shows": past_shows,
         "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcoming_shows)
+        "past_shows_count": artist.past_shows_count,
+        "upcoming_shows_count": artist.upcoming_shows_count
     }
 
-    return render_template('pages/show_artist.html', artist=data)
+    return render_template('pages/show_artist.html', artist=data,
+                           prev_page=page - 1 if page > 1 else None,
+                           next_page=page + 1 if first + per_page < artist.upcoming_shows_count else None)
+
+
+@app.route('/artists/<int:artist_id>/past_shows')
+def show_artist_past_shows(artist_id):
+    return past_shows_page(Show.artist_id, artist_id, Venue, 'venue')
 
 
 #  Update
@@ -411,21 +768,35 @@ def create_artist_submission():
 
 @app.route('/shows')
 def shows():
-    # displays list of shows at /shows
-    shows = Show.query.order_by(db.desc(Show.time))
+    # displays list of shows at /shows, newest first, one page at a time
+    page = max(request.args.get('page', 1, type=int), 1)
+    rows = db.session.query(
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.time
+    ).join(Venue, Show.venue_id == Venue.id).join(Artist, Show.artist_id == Artist.id).\
+        order_by(db.desc(Show.time), db.desc(Show.id)).\
+        offset((page - 1) * SHOWS_PER_PAGE).limit(SHOWS_PER_PAGE + 1).all()
+
+    # the extra row only tells whether an older page exists
+    has_next = len(rows) > SHOWS_PER_PAGE
     data = []
-
-    for show in shows:
+    for row in rows[:SHOWS_PER_PAGE]:
         data.append({
-            "venue_id": show.venue_id,
-            "venue_name": show.venue.name,
-            "artist_id": show.artist_id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": format_datetime(str(show.time))
+            "venue_id": row.venue_id,
+            "venue_name": row.venue_name,
+            "artist_id": row.artist_id,
+            "artist_name": row.artist_name,
+            "artist_image_link": row.artist_image_link,
+            "start_time": row.time
         })
 
-    return render_template('pages/shows.html', shows=data)
+    return render_template('pages/shows.html', shows=data,
+                           prev_page=page - 1 if page > 1 else None,
+                           next_page=page + 1 if has_next else None)
 
 
 @app.route('/shows/create')
@@ -455,6 +826,144 @@ def create_show_submission():
     return render_template('pages/home.html')
 
 
+#  Import Shows
+#  ----------------------------------------------------------------
+
+SHOW_IMPORT_CHUNK_SIZE = 1000
+
+
+def read_show_rows(text, format):
+    # CSV with an artist_id,venue_id,start_time header, or a JSON list of
+    # objects with those keys (optionally wrapped as {"shows": [...]})
+    if format == 'csv':
+        try:
+            return list(csv.DictReader(io.StringIO(text)))
+        except csv.Error as e:
+            raise ValueError(f'invalid CSV: {e}')
+    rows = json.loads(text)
+    if isinstance(rows, dict):
+        rows = rows.get('shows')
+    if not isinstance(rows, list):
+        raise ValueError('expected a list of shows')
+    return rows
+
+
+def parse_show_row(row):
+    if not isinstance(row, dict):
+        raise ValueError('expected artist_id, venue_id and start_time')
+    show = {}
+    for field in ('artist_id', 'venue_id'):
+        # whole numbers only; int() would also take 1.9 or true as 1
+        value = row.get(field)
+        if isinstance(value, str) and value.strip().isdecimal():
+            value = int(value)
+        if type(value) is not int:
+            raise ValueError(f'{field} must be an integer')
+        show[field] = value
+    try:
+        show['time'] = dateutil.parser.parse(row.get('start_time'))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError('start_time must be a date and time')
+    if show['time'].tzinfo is not None:
+        raise ValueError('start_time must be a local time without a time zone')
+    return show
+
+
+def import_shows(rows):
+    # rows that fail validation are reported by number (counting from 1)
+    # and skipped; the rest are inserted together
+    start = time.perf_counter()
+    errors = []
+    shows = []
+    for number, row in enumerate(rows, 1):
+        try:
+            shows.append((number, parse_show_row(row)))
+        except ValueError as e:
+            errors.append({"row": number, "error": str(e)})
+
+    known = set()
+    if shows:
+        # every referenced artist and venue checked in one query
+        artist_ids = {show['artist_id'] for _, show in shows}
+        venue_ids = {show['venue_id'] for _, show in shows}
+        known = set(db.session.query(db.literal('artist_id'), Artist.id).
+                    filter(Artist.id.in_(artist_ids)).
+                    union_all(db.session.query(db.literal('venue_id'), Venue.id).
+                              filter(Venue.id.in_(venue_ids))).all())
+
+    valid = []
+    for number, show in shows:
+        missing = [field for field in ('artist_id', 'venue_id')
+                   if (field, show[field]) not in known]
+        if missing:
+            errors.append({"row": number,
+                           "error": ', '.join(f'{field} {show[field]} does not exist' for field in missing)})
+        else:
+            valid.append(show)
+
+    # multi-row INSERTs skip the ORM events, so the show counters are
+    # adjusted here for the whole batch
+    now = datetime.now()
+    for show in valid:
+        show['counted_upcoming'] = show['time'] > now
+    for first in range(0, len(valid), SHOW_IMPORT_CHUNK_SIZE):
+        db.session.execute(Show.__table__.insert().values(valid[first:first + SHOW_IMPORT_CHUNK_SIZE]))
+    adjust_show_counters([(show['venue_id'], show['artist_id'])
+                          for show in valid if show['counted_upcoming']], 1, 0)
+    adjust_show_counters([(show['venue_id'], show['artist_id'])
+                          for show in valid if not show['counted_upcoming']], 0, 1)
+    db.session.commit()
+
+    seconds = time.perf_counter() - start
+    errors.sort(key=lambda error: error['row'])
+    return {
+        "created": len(valid),
+        "errors": errors,
+        "seconds": seconds,
+        "rows_per_second": len(rows) / seconds if seconds else 0
+    }
+
+
+@app.route('/shows/import', methods=['POST'])
+def import_shows_submission():
+    # accepts a CSV or JSON body, or either as an uploaded `file`
+    upload = request.files.get('file')
+    try:
+        if upload is not None:
+            rows = read_show_rows(upload.read().decode('utf-8-sig'),
+                                  'csv' if upload.filename.lower().endswith('.csv') else 'json')
+        else:
+            rows = read_show_rows(request.get_data().decode('utf-8-sig'),
+                                  'csv' if request.mimetype == 'text/csv' else 'json')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        result = import_shows(rows)
+    except:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    return jsonify(result)
+
+
+@app.cli.command('import-shows')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_shows_command(path):
+    """Import shows from a CSV or JSON file."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            rows = read_show_rows(f.read(), 'csv' if path.lower().endswith('.csv') else 'json')
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    result = import_shows(rows)
+    for error in result['errors']:
+        print(f"row {error['row']}: {error['error']}")
+    print(f"{result['created']} shows created, {len(result['errors'])} rows rejected, "
+          f"{result['rows_per_second']:.0f} rows/s")
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
@@ -466,13 +975,14 @@ def server_error(error):
 
 
 if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+    # requests only queue log records; a background thread writes them
+    log_handler = start_queue_logging(
+        app.logger, 'error.log',
+        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'),
+        logging.INFO
     )
+    metrics.add_collector(log_handler.collect)
     app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
     app.logger.info('errors')
 
 # ----------------------------------------------------------------------------#
@@ -0,0 +1,144 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+from sqlalchemy import event
+
+from app import app, db, Venue, Artist, Show, get_venue_areas, rebuild_show_counters, \
+    format_datetime
+
+# the benchmark creates and drops its own tables, so never point it at the
+# real fyyur database
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'FYYUR_BENCHMARK_DATABASE_URL',
+    'postgresql://weiyuhuang@localhost:5432/fyyur_benchmark'
+)
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def seed(num_venues, shows_per_venue=3):
+    db.drop_all()
+    # the name search indexes need pg_trgm
+    db.session.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    db.session.commit()
+    db.create_all()
+
+    artist = Artist(name='Benchmark Artist', genres=['Jazz'])
+    db.session.add(artist)
+    db.session.flush()
+
+    now = datetime.now()
+    cities = [('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX')]
+    venues = [Venue(name=f'Venue {i}', city=cities[i % 3][0], state=cities[i % 3][1])
+              for i in range(num_venues)]
+    db.session.add_all(venues)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(Show, [
+        {'venue_id': venue.id, 'artist_id': artist.id,
+         'time': now + timedelta(days=(j - 1) * 30)}
+        for venue in venues for j in range(shows_per_venue)
+    ])
+    # bulk inserts skip the ORM events that keep the show counters
+    rebuild_show_counters(now)
+
+
+def bench_venues(sizes=(10, 100, 1000, 10000)):
+    print('venues  queries  seconds')
+    for size in sizes:
+        seed(size)
+        with QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            get_venue_areas()
+            elapsed = time.perf_counter() - start
+        print(f'{size:6d}  {counter.count:7d}  {elapsed:7.4f}')
+
+
+def bench_artist(num_shows=10000, repeat=5):
+    seed(10)
+    artist = Artist(name='Touring Artist', genres=['Rock n Roll'])
+    db.session.add(artist)
+    db.session.flush()
+
+    now = datetime.now()
+    venue_ids = [id for id, in db.session.query(Venue.id)]
+    db.session.bulk_insert_mappings(Show, [
+        {'venue_id': venue_ids[i % len(venue_ids)], 'artist_id': artist.id,
+         'time': now + timedelta(hours=i - num_shows // 2)}
+        for i in range(num_shows)
+    ])
+    rebuild_show_counters(now)
+
+    client = app.test_client()
+    with QueryCounter(db.engine) as counter:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            client.get(f'/artists/{artist.id}')
+        elapsed = (time.perf_counter() - start) / repeat
+    print(f'artist page with {num_shows} shows: {counter.count // repeat} queries, '
+          f'{elapsed:.4f} seconds')
+
+
+def format_datetime_before(value, format='medium'):
+    # the filter before patterns were cached: a string round trip through
+    # dateutil and a pattern parse on every call
+    date = dateutil.parser.parse(str(value))
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+def check_format_datetime():
+    value = datetime(2019, 5, 21, 21, 30)
+    for format in ('short', 'medium', 'long', 'full', 'yyyy-MM-dd HH:mm'):
+        before, after = format_datetime_before(value, format), format_datetime(value, format)
+        assert before == after, f'{format!r} formats as {after!r}, was {before!r}'
+
+
+def bench_format_datetime(rows=100000):
+    start_time = datetime(2020, 5, 21, 21, 30)
+    times = [start_time + timedelta(minutes=i) for i in range(rows)]
+
+    start = time.perf_counter()
+    for value in times:
+        format_datetime_before(value, 'full')
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for value in times:
+        format_datetime(value, 'full')
+    after = time.perf_counter() - start
+
+    print(f'format {rows} datetimes: {before:.3f}s before, {after:.3f}s after')
+
+
+def main():
+    check_format_datetime()
+    bench_format_datetime()
+    with app.app_context():
+        bench_venues()
+        bench_artist()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
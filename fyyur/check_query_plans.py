@@ -0,0 +1,79 @@
+import sys
+
+from sqlalchemy import event
+
+from app import app, db, Venue, Artist
+
+# Renders the busiest pages, records the SQL they run and EXPLAINs every
+# statement with sequential scans disabled. A sequential scan on one of the
+# INDEXED_TABLES in that setting means no index can serve the query, so the
+# script exits with status 1 and prints the offending statements.
+#
+#     python check_query_plans.py
+
+HOT_PAGES = [
+    '/venues/{venue_id}',
+    '/venues/{venue_id}/past_shows',
+    '/artists/{artist_id}',
+    '/artists/{artist_id}/past_shows',
+    '/shows',
+    '/shows?page=2'
+]
+
+INDEXED_TABLES = {'Show'}
+
+
+def capture_statements(paths):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    client = app.test_client()
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        for path in paths:
+            client.get(path)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def sequential_scans(plan):
+    scans = []
+    if plan['Node Type'] == 'Seq Scan':
+        scans.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        scans.extend(sequential_scans(child))
+    return scans
+
+
+def check_query_plans():
+    venue = db.session.query(Venue.id).first()
+    artist = db.session.query(Artist.id).first()
+    if venue is None or artist is None:
+        print('add at least one venue and artist before checking query plans')
+        return 1
+
+    paths = [page.format(venue_id=venue.id, artist_id=artist.id) for page in HOT_PAGES]
+    failures = []
+    with db.engine.connect() as connection:
+        connection.execute('SET enable_seqscan = off')
+        for statement, parameters in capture_statements(paths):
+            plan = connection.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+            scanned = INDEXED_TABLES.intersection(sequential_scans(plan[0]['Plan']))
+            if scanned:
+                failures.append((sorted(scanned), statement))
+
+    for tables, statement in failures:
+        print(f'sequential scan on {", ".join(tables)}:\n{statement}\n')
+    print(f'{len(failures)} of the hot queries scan {", ".join(sorted(INDEXED_TABLES))} sequentially')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    # the counter roll writes, and is not one of the page queries
+    app.config['SHOW_COUNTERS_ROLL_INTERVAL'] = 0
+    with app.app_context():
+        sys.exit(check_query_plans())
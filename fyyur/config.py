@@ -11,4 +11,23 @@ DEBUG = True
 
 SQLALCHEMY_DATABASE_URI = 'postgresql://weiyuhuang@localhost:5432/fyyur'
 
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Past shows listed on a venue or artist page before "Load more"
+PAST_SHOWS_LIMIT = 10
+
+# Upcoming shows listed per page of an artist page
+UPCOMING_SHOWS_PER_PAGE = 12
+
+# Add Server-Timing and X-Query-Count headers to every response while developing
+METRICS_RESPONSE_HEADER = DEBUG
+
+# Seconds between moving started shows to the past show counts while serving
+# requests; 0 leaves it to `flask roll-show-counters`
+SHOW_COUNTERS_ROLL_INTERVAL = 60
+
+# Artists listed per page of the artist directory
+ARTISTS_PER_PAGE = 50
+
+# Send the artist directory as it renders rather than once it is complete
+STREAM_ARTISTS = False
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from sqlalchemy import event, func
+
+# ----------------------------------------------------------------------------#
+# Genre counts for the artist directory sidebar.
+#
+# Counting genres unnests the genres array of every artist, so the counts
+# are kept in process and recomputed only after an artist is added, edited
+# or deleted. Those events are only seen by the process that made the
+# change, so the counts are also recomputed every `ttl` seconds.
+# ----------------------------------------------------------------------------#
+
+GENRE_COUNTS_TTL = 300
+
+
+class GenreCounts:
+    """ Cached number of rows of `model` listing each of its genres """
+
+    def __init__(self, model, ttl=GENRE_COUNTS_TTL):
+        self.model = model
+        self.ttl = ttl
+        self.counts = None
+        self.expires = 0
+        self._lock = threading.Lock()
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, name, self.invalidate)
+
+    def invalidate(self, *args):
+        self.counts = None
+
+    def count(self, session):
+        if session.bind.dialect.name != 'postgresql':
+            counts = {}
+            for genres, in session.query(self.model.genres):
+                for genre in genres or []:
+                    counts[genre] = counts.get(genre, 0) + 1
+            return sorted(counts.items())
+
+        genres = session.query(func.unnest(self.model.genres).label('genre')).subquery()
+        return session.query(genres.c.genre, func.count()).\
+            group_by(genres.c.genre).order_by(genres.c.genre).all()
+
+    def get(self, session):
+        """ (genre, count) pairs in genre order """
+        counts = self.counts
+        if counts is None or time.monotonic() >= self.expires:
+            with self._lock:
+                counts = [(genre, count) for genre, count in self.count(session)]
+                self.counts = counts
+                self.expires = time.monotonic() + self.ttl
+        return counts
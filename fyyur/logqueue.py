@@ -0,0 +1,119 @@
+import atexit
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# ----------------------------------------------------------------------------#
+# Non-blocking file logging.
+#
+# Request threads only put records on a bounded queue; a listener thread
+# takes them off in batches and writes each batch to a rotating log file
+# with a single flush. When the queue is full, records are dropped and
+# counted instead of making the request wait for the disk.
+# ----------------------------------------------------------------------------#
+
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 200
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+
+class DroppingQueueHandler(QueueHandler):
+    """ QueueHandler that counts and drops records when its queue is full """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Handler.handle holds the handler lock around emit
+            self.dropped += 1
+
+    def collect(self):
+        return [
+            '# HELP flask_log_records_dropped_total Log records dropped because the log queue was full.',
+            '# TYPE flask_log_records_dropped_total counter',
+            f'flask_log_records_dropped_total {self.dropped}',
+            '# HELP flask_log_queue_records Log records waiting to be written.',
+            '# TYPE flask_log_queue_records gauge',
+            f'flask_log_queue_records {self.queue.qsize()}'
+        ]
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """ RotatingFileHandler that can write many records with one flush """
+
+    def emit_batch(self, records):
+        self.acquire()
+        try:
+            for record in records:
+                if record.levelno < self.level or not self.filter(record):
+                    continue
+                try:
+                    if self.shouldRollover(record):
+                        self.doRollover()
+                    if self.stream is None:
+                        self.stream = self._open()
+                    self.stream.write(self.format(record) + self.terminator)
+                except Exception:
+                    self.handleError(record)
+            self.flush()
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    """ QueueListener that hands its handler batches of up to batch_size records """
+
+    def __init__(self, queue, handler, batch_size=LOG_BATCH_SIZE):
+        super().__init__(queue, handler)
+        self.handler = handler
+        self.batch_size = batch_size
+
+    def _monitor(self):
+        stopped = False
+        while not stopped:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size and batch[-1] is not self._sentinel:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            if batch[-1] is self._sentinel:
+                batch.pop()
+                stopped = True
+            if batch:
+                self.handler.emit_batch([self.prepare(record) for record in batch])
+
+    def enqueue_sentinel(self):
+        # wait for room rather than fail to stop when the queue is full
+        self.queue.put(self._sentinel)
+
+
+def start_queue_logging(logger, filename, formatter, level,
+                        queue_size=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE,
+                        max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """
+    Send the records of `logger` to a rotating `filename` through a queue
+
+    Returns the queue handler, whose `dropped` counts records lost to a full
+    queue and whose `collect` reports it for the metrics endpoint.
+    """
+    file_handler = BatchingRotatingFileHandler(filename, maxBytes=max_bytes,
+                                               backupCount=backup_count)
+    file_handler.setFormatter(formatter)
+    file_handler.setLevel(level)
+
+    log_queue = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.setLevel(level)
+
+    listener = BatchingQueueListener(log_queue, file_handler, batch_size)
+    listener.start()
+    # write out whatever is still queued when the process exits
+    atexit.register(listener.stop)
+
+    logger.addHandler(queue_handler)
+    return queue_handler
@@ -0,0 +1,29 @@
+"""add trigram indexes on venue and artist names
+
+Revision ID: 3f6d2a9c1b8e
+Revises: 8ef80edfc2d8
+Create Date: 2026-10-18 10:12:41.506913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6d2a9c1b8e'
+down_revision = '8ef80edfc2d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_Venue_name_trgm', 'Venue', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_Artist_name_trgm', 'Artist', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_trgm', table_name='Artist')
+    op.drop_index('ix_Venue_name_trgm', table_name='Venue')
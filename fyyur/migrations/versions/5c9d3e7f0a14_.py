@@ -0,0 +1,24 @@
+"""add name and id index for paging the artist directory
+
+Revision ID: 5c9d3e7f0a14
+Revises: e2a8f5c3d761
+Create Date: 2026-10-18 12:08:52.204417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9d3e7f0a14'
+down_revision = 'e2a8f5c3d761'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Artist_name_id', 'Artist', ['name', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_id', table_name='Artist')
@@ -0,0 +1,25 @@
+"""add gin index on artist genres
+
+Revision ID: 8a1f6b2e4c93
+Revises: 5c9d3e7f0a14
+Create Date: 2026-10-18 12:47:15.390226
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a1f6b2e4c93'
+down_revision = '5c9d3e7f0a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Artist_genres', 'Artist', ['genres'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_Artist_genres', table_name='Artist')
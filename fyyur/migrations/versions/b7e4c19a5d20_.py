@@ -0,0 +1,47 @@
+"""add upcoming and past show counters to venues and artists
+
+Revision ID: b7e4c19a5d20
+Revises: 3f6d2a9c1b8e
+Create Date: 2026-10-18 11:03:27.118240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4c19a5d20'
+down_revision = '3f6d2a9c1b8e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+    op.add_column('Show', sa.Column('counted_upcoming', sa.Boolean(),
+                                    server_default=sa.false(), nullable=False))
+    op.create_index('ix_Show_counted_upcoming_time', 'Show', ['time'], unique=False,
+                    postgresql_where=sa.text('counted_upcoming'))
+
+    # fill the counters in, as `flask rebuild-show-counters` would
+    op.execute('UPDATE "Show" SET counted_upcoming = time > now()')
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(f'''
+            UPDATE "{table}" SET
+                upcoming_shows_count = (SELECT count(*) FROM "Show"
+                                        WHERE "Show".{column} = "{table}".id AND counted_upcoming),
+                past_shows_count = (SELECT count(*) FROM "Show"
+                                    WHERE "Show".{column} = "{table}".id AND NOT counted_upcoming)
+        ''')
+
+
+def downgrade():
+    op.drop_index('ix_Show_counted_upcoming_time', table_name='Show')
+    op.drop_column('Show', 'counted_upcoming')
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,28 @@
+"""add show indexes for venue, artist and time lookups
+
+Revision ID: e2a8f5c3d761
+Revises: b7e4c19a5d20
+Create Date: 2026-10-18 11:41:09.672315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a8f5c3d761'
+down_revision = 'b7e4c19a5d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_time', 'Show', ['venue_id', 'time'], unique=False)
+    op.create_index('ix_Show_artist_id_time', 'Show', ['artist_id', 'time'], unique=False)
+    op.create_index('ix_Show_time', 'Show', ['time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Show_time', table_name='Show')
+    op.drop_index('ix_Show_artist_id_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_time', table_name='Show')
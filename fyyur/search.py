@@ -0,0 +1,81 @@
+from sqlalchemy import event, func
+
+# ----------------------------------------------------------------------------#
+# Name search for venues and artists.
+#
+# On PostgreSQL the ILIKE filter is served by the pg_trgm GIN indexes on the
+# name columns, and the total is a window count carried on each row, so one
+# query returns both. Other databases (SQLite test runs) have no trigram
+# index, so an in-process one is kept instead.
+# ----------------------------------------------------------------------------#
+
+SEARCH_RESULTS_LIMIT = 50
+
+
+def trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """ In-process trigram inverted index over the name column of a model """
+
+    def __init__(self, model):
+        self.model = model
+        self.names = None
+        self.postings = None
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, name, self.invalidate)
+
+    def invalidate(self, *args):
+        self.names = None
+
+    def build(self, session):
+        names = {}
+        postings = {}
+        for id, name in session.query(self.model.id, self.model.name):
+            names[id] = name
+            for trigram in trigrams(name):
+                postings.setdefault(trigram, set()).add(id)
+        self.postings = postings
+        self.names = names
+
+    def search(self, session, term):
+        if self.names is None:
+            self.build(session)
+        names = self.names
+
+        term = term.lower()
+        term_trigrams = trigrams(term)
+        if term_trigrams:
+            candidates = set.intersection(*(self.postings.get(trigram, set())
+                                            for trigram in term_trigrams))
+        else:
+            # too short to have a trigram, check every name
+            candidates = names.keys()
+
+        return sorted((names[id], id) for id in candidates if term in names[id].lower())
+
+
+def search_by_name(session, model, term, index, page=1, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Find rows of `model` whose name contains `term`, case insensitively
+
+    Returns the total number of matches and the `page`th run of up to
+    `limit` of them, ordered by name, as dicts with the id and name.
+    """
+    offset = (page - 1) * limit
+    if session.bind.dialect.name != 'postgresql':
+        matches = index.search(session, term)
+        return len(matches), [{"id": id, "name": name} for name, id in matches[offset:offset + limit]]
+
+    query = session.query(model.id, model.name).filter(model.name.ilike(f'%{term}%'))
+    rows = query.add_columns(func.count().over().label('total')).\
+        order_by(model.name, model.id).offset(offset).limit(limit).all()
+
+    if rows:
+        count = rows[0].total
+    else:
+        # past the last page no row carries the total
+        count = query.count() if offset else 0
+    return count, [{"id": row.id, "name": row.name} for row in rows]
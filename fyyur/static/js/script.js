@@ -2,3 +2,24 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// appends the next page of past shows to the section of a "Load more" button
+$(document).on('click', '.load-more-shows', function () {
+  var button = $(this);
+  var kind = button.data('kind');
+  $.getJSON(button.data('url'), {offset: button.data('offset')}, function (result) {
+    var row = button.closest('section').find('.row');
+    $.each(result.shows, function (i, show) {
+      var tile = $('<div class="col-sm-4"><div class="tile tile-show">' +
+        '<img alt="Show Image" /><h5><a></a></h5><h6></h6></div></div>');
+      tile.find('img').attr('src', show[kind + '_image_link']);
+      tile.find('a').attr('href', '/' + kind + 's/' + show[kind + '_id']).text(show[kind + '_name']);
+      tile.find('h6').text(show.start_time);
+      row.append(tile);
+    });
+    button.data('offset', button.data('offset') + result.shows.length);
+    if (!result.has_more) {
+      button.remove();
+    }
+  });
+});
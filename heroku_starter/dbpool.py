@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+'''
+POOL_DEFAULTS
+    the connection pool profile setup_db uses unless told otherwise. Each
+    setting can be overridden with a DB_POOL_<NAME> key in app.config or
+    environment variable, e.g. DB_POOL_SIZE=20 or DB_POOL_PRE_PING=false
+'''
+POOL_DEFAULTS = {
+    'size': 5,
+    'max_overflow': 10,
+    # seconds to wait for a connection before giving up
+    'timeout': 30,
+    # seconds before a connection is replaced; keep it under any idle
+    # timeout of PgBouncer or the server
+    'recycle': 1800,
+    'pre_ping': True,
+    # milliseconds a statement may run, 0 for no limit
+    'statement_timeout': 0
+}
+
+
+'''
+TimedQueuePool
+    QueuePool that counts checkouts, the time spent waiting for them and
+    the checkouts that timed out
+'''
+class TimedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.checkout_timeouts += timed_out
+                self.checkout_seconds += elapsed
+
+
+'''
+pool_profile(config, overrides=None)
+    the pool settings from `overrides`, then DB_POOL_* keys of `config`,
+    then DB_POOL_* environment variables, then POOL_DEFAULTS
+'''
+def pool_profile(config, overrides=None):
+    profile = {}
+    for name, default in POOL_DEFAULTS.items():
+        key = 'DB_POOL_' + name.upper()
+        value = config.get(key, os.environ.get(key, default))
+        if isinstance(default, bool) and isinstance(value, str):
+            value = value.lower() in ('1', 'true', 'yes')
+        profile[name] = type(default)(value)
+    profile.update(overrides or {})
+    return profile
+
+
+'''
+engine_options(profile)
+    SQLALCHEMY_ENGINE_OPTIONS for a pool profile
+'''
+def engine_options(profile):
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': profile['size'],
+        'max_overflow': profile['max_overflow'],
+        'pool_timeout': profile['timeout'],
+        'pool_recycle': profile['recycle'],
+        'pool_pre_ping': profile['pre_ping']
+    }
+    if profile['statement_timeout']:
+        # sent when connecting; PgBouncer refuses this startup parameter, so
+        # behind it set statement_timeout on the database role instead
+        options['connect_args'] = {
+            'options': '-c statement_timeout={}'.format(profile['statement_timeout'])
+        }
+    return options
+
+
+'''
+pool_metrics(pool)
+    Prometheus lines describing a TimedQueuePool
+'''
+def pool_metrics(pool):
+    values = [
+        ('db_pool_size', 'gauge', 'Connections the pool keeps open.', pool.size()),
+        ('db_pool_checked_out', 'gauge', 'Connections in use.', pool.checkedout()),
+        ('db_pool_overflow', 'gauge', 'Connections open beyond the pool size.',
+         max(pool.overflow(), 0)),
+        ('db_pool_checkouts_total', 'counter', 'Connections taken from the pool.',
+         pool.checkouts),
+        ('db_pool_checkout_seconds_total', 'counter', 'Time spent waiting for a connection.',
+         pool.checkout_seconds),
+        ('db_pool_checkout_timeouts_total', 'counter', 'Waits for a connection that timed out.',
+         pool.checkout_timeouts)
+    ]
+    lines = []
+    for name, kind, description, value in values:
+        lines.append(f'# HELP flask_{name} {description}')
+        lines.append(f'# TYPE flask_{name} {kind}')
+        lines.append(f'flask_{name} {value}')
+    return lines
@@ -2,6 +2,7 @@ from sqlalchemy import Column, String, create_engine
 from flask_sqlalchemy import SQLAlchemy
 import json
 import os
+from dbpool import engine_options, pool_profile
 
 database_path = os.environ['DATABASE_URL']
 
@@ -9,11 +10,13 @@ db = SQLAlchemy()
 
 '''
 setup_db(app)
-    binds a flask application and a SQLAlchemy service
+    binds a flask application and a SQLAlchemy service, with the connection
+    pool settings of `pool`, app.config or the environment (see dbpool)
 '''
-def setup_db(app, database_path=database_path):
+def setup_db(app, database_path=database_path, pool=None):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(pool_profile(app.config, pool))
     db.app = app
     db.init_app(app)
     db.create_all()
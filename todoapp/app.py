@@ -2,12 +2,14 @@ from flask import Flask, render_template, request, jsonify, abort, redirect, url
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 import sys
+from metrics import Metrics
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'postgres://weiyuhuang@localhost:5432/todoapp'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
+metrics = Metrics(app)
 
 order_item = db.Table
 
@@ -1,12 +1,121 @@
 import os
-from flask import Flask, request, abort, jsonify
+import base64
+import json
+import logging
+import select
+import threading
+import time
+from flask import Flask, Response, request, abort, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 import random
 
-from models import setup_db, Question, Category
+from models import setup_db, db_pool_metrics, db, Question, Category, \
+    database_path as default_database_path
+from metrics import Metrics
 
 QUESTIONS_PER_PAGE = 10
+MAX_QUESTIONS_PER_PAGE = 100
+COUNT_CACHE_TTL = 60
+
+
+class CountCache:
+    """ Row counts kept for `ttl` seconds or until a write invalidates them """
+
+    def __init__(self, ttl=COUNT_CACHE_TTL):
+        self.ttl = ttl
+        self.counts = {}
+
+    def get(self, key, query):
+        count, expires_at = self.counts.get(key, (None, 0))
+        if time.monotonic() >= expires_at:
+            count = query.count()
+            self.counts[key] = (count, time.monotonic() + self.ttl)
+        return count
+
+    def invalidate(self):
+        self.counts.clear()
+
+
+CATEGORIES_CHANNEL = 'categories_changed'
+
+
+class CategoriesCache:
+    """
+    The {id: type} map of categories and its JSON encoding
+
+    Both are loaded on first use and kept until invalidate(), which bumps
+    `version`. On PostgreSQL a background connection also listens on
+    CATEGORIES_CHANNEL, so `NOTIFY categories_changed` (or a trigger on the
+    categories table) invalidates every process.
+    """
+
+    def __init__(self):
+        self.version = 1
+        self.categories = None
+        self.json = None
+        self.listening = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        """ (categories, json, version) """
+        with self._lock:
+            if self.categories is None:
+                categories = {category.id: category.type
+                              for category in Category.query.order_by(Category.id)}
+                self.json = json.dumps({str(id): type for id, type in categories.items()})
+                self.categories = categories
+            if not self.listening and db.engine.dialect.name == 'postgresql':
+                self.listening = True
+                threading.Thread(target=self.listen, args=(db.engine,), daemon=True).start()
+            return self.categories, self.json, self.version
+
+    def invalidate(self):
+        with self._lock:
+            self.categories = None
+            self.json = None
+            self.version += 1
+            return self.version
+
+    def listen(self, engine):
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                # a connection of its own, outside the pool
+                connection = engine.raw_connection()
+                connection.detach()
+                connection.connection.autocommit = True
+                connection.cursor().execute('LISTEN ' + CATEGORIES_CHANNEL)
+                if reconnecting:
+                    # changes missed while not listening
+                    self.invalidate()
+                while True:
+                    if select.select([connection.connection], [], [], 60) == ([], [], []):
+                        continue
+                    connection.connection.poll()
+                    if connection.connection.notifies:
+                        del connection.connection.notifies[:]
+                        self.invalidate()
+            except Exception:
+                logging.getLogger(__name__).exception('listening for category changes failed')
+            finally:
+                if connection is not None:
+                    connection.close()
+            reconnecting = True
+            time.sleep(5)
+
+
+# one per process, shared by the apps it creates
+categories_cache = CategoriesCache()
+
+
+def json_with_categories(payload, status=200):
+    """ Respond with `payload` plus the cached categories JSON, spliced in as is """
+    categories, categories_json, version = categories_cache.get()
+    payload = dict(payload, categories_version=version)
+    body = json.dumps(payload)[:-1] + ', "categories": ' + categories_json + '}'
+    return Response(body, status=status, mimetype='application/json')
 
 
 def get_paginated_questions(request, questions):
@@ -18,14 +127,81 @@ def get_paginated_questions(request, questions):
     return formatted_questions[start:end]
 
 
-def get_random_question(questions):
-    return questions[random.randint(0, len(questions) - 1)]
+def get_page_of_questions(request, query):
+    """ Fetch only the requested page of an ordered query """
+    page = request.args.get('page', 1, type=int)
+    if page < 1:
+        return []
+
+    questions = query.offset((page - 1) * QUESTIONS_PER_PAGE).limit(QUESTIONS_PER_PAGE)
+    return [question.format() for question in questions]
+
+
+def encode_cursor(after_id):
+    cursor = json.dumps({'after_id': after_id}).encode('utf-8')
+    return base64.urlsafe_b64encode(cursor).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['after_id'])
+    except (ValueError, KeyError, TypeError):
+        abort(400)
+
+
+def get_keyset_page_of_questions(request):
+    """
+    Fetch the questions following a cursor, ordered by id
+
+    The cursor comes either as the opaque `cursor` returned by a previous
+    call or as a plain `after_id`. One row beyond `limit` is fetched to
+    know whether another page exists, so no count is needed.
+    """
+    if 'cursor' in request.args:
+        after_id = decode_cursor(request.args['cursor'])
+    else:
+        after_id = request.args.get('after_id', 0, type=int)
+    limit = request.args.get('limit', QUESTIONS_PER_PAGE, type=int)
+    if limit < 1 or limit > MAX_QUESTIONS_PER_PAGE:
+        abort(400)
 
+    questions = Question.query.filter(Question.id > after_id).\
+        order_by(Question.id).limit(limit + 1).all()
 
-def create_app(test_config=None):
-    # create and configure the app
+    next_cursor = None
+    if len(questions) > limit:
+        questions = questions[:limit]
+        next_cursor = encode_cursor(questions[-1].id)
+
+    return [question.format() for question in questions], next_cursor
+
+
+def get_random_question(query, previous_questions):
+    """
+    Pick a random question from a query, skipping the ones already asked
+
+    The asked ids are excluded in SQL and the pick is a single offset into
+    the remaining rows, so it takes the same two queries however far into
+    the quiz the player is. Returns None once every question was asked.
+    """
+    if previous_questions:
+        query = query.filter(~Question.id.in_(set(previous_questions)))
+
+    remaining = query.count()
+    if remaining == 0:
+        return None
+
+    return query.order_by(Question.id).offset(random.randrange(remaining)).first()
+
+
+def create_app(test_config=None, database_path=None, pool=None):
+    # create and configure the app; `database_path` and `pool` are handed to
+    # setup_db, so tools can start on a database other than the default
     app = Flask(__name__)
-    setup_db(app)
+    setup_db(app, database_path or default_database_path, pool)
+    question_counts = CountCache()
+    metrics = Metrics(app)
+    metrics.add_collector(db_pool_metrics)
 
     # Set up CORS. Allow '*' for all origins.
     CORS(app, resources={'/': {'origins': '*'}})
@@ -55,49 +231,56 @@ def create_app(test_config=None):
         """
 
         try:
-            categories = Category.query.all()
-            categories_dict = {}
-
-            for category in categories:
-                categories_dict[category.id] = category.type
-
-            return jsonify({
-                'success': True,
-                'categories': categories_dict
-            }), 200
+            return json_with_categories({
+                'success': True
+            })
         except:
             abort(500)
 
+    @app.route('/categories/invalidate', methods=['POST'])
+    def invalidate_categories():
+        """
+        Drop this process's cached categories, e.g. after editing the table
+
+        Other processes are reached with `NOTIFY categories_changed`.
+        """
+        return jsonify({
+            'success': True,
+            'categories_version': categories_cache.invalidate()
+        }), 200
+
     @app.route('/questions')
     def get_questions():
         """
         Get paginated questions
 
-        Return all questions, listed as paginated, or status 404
+        Return one page of questions, or status 404. Pages are addressed by
+        `page`, or by `cursor`/`after_id` and `limit` for keyset pagination,
+        in which case the response carries the `next_cursor` to follow.
         """
-        questions = Question.query.order_by(Question.id).all()
-        categories = Category.query.order_by(Category.id).all()
-        current_questions = get_paginated_questions(request, questions)
+        next_cursor = None
+        if any(arg in request.args for arg in ('cursor', 'after_id', 'limit')):
+            current_questions, next_cursor = get_keyset_page_of_questions(request)
+        else:
+            current_questions = get_page_of_questions(
+                request, Question.query.order_by(Question.id))
 
         if len(current_questions) == 0:
             abort(404)
 
-        categories_dict = {}
-        for category in categories:
-            categories_dict[category.id] = category.type
-
-        return jsonify({
+        return json_with_categories({
             'success': True,
-            'total_questions': len(questions),
-            'categories': categories_dict,
-            'questions': current_questions
-        }), 200
+            'total_questions': question_counts.get('all', Question.query),
+            'questions': current_questions,
+            'next_cursor': next_cursor
+        })
 
     @app.route('/questions/<int:question_id>', methods=['DELETE'])
     def delete_question(question_id):
         try:
             question = Question.query.get(question_id)
             question.delete()
+            question_counts.invalidate()
 
             return jsonify({
                 'success': True,
@@ -124,6 +307,7 @@ def create_app(test_config=None):
             question = Question(question=question, answer=answer,
                                 difficulty=difficulty, category=category)
             question.insert()
+            question_counts.invalidate()
 
             return jsonify({
                 'success': True,
@@ -160,12 +344,12 @@ def create_app(test_config=None):
         if category is None:
             abort(422)
 
-        questions = Question.query.filter_by(category=category_id).all()
+        questions = Question.query.filter_by(category=category_id)
 
         return jsonify({
             'success': True,
-            'questions': get_paginated_questions(request, questions),
-            'total_questions': len(questions),
+            'questions': get_page_of_questions(request, questions.order_by(Question.id)),
+            'total_questions': question_counts.get(('category', category_id), questions),
             'current_category': category.type
         }), 200
 
@@ -179,19 +363,15 @@ def create_app(test_config=None):
             abort(400)
 
         if quiz_category['id'] == 0:
-            questions = Question.query.all()
+            questions = Question.query
         else:
-            questions = Question.query.filter_by(
-                category=quiz_category['id']).all()
+            questions = Question.query.filter_by(category=quiz_category['id'])
 
-        next_question = get_random_question(questions)
-        while next_question.id in previous_questions:
-            next_question = get_random_question(questions)
-
-            if (len(previous_questions) == len(questions)):
-                return jsonify({
-                    'success': True
-                })
+        next_question = get_random_question(questions, previous_questions)
+        if next_question is None:
+            return jsonify({
+                'success': True
+            })
 
         return jsonify({
             'success': True,
@@ -0,0 +1,77 @@
+import os
+import statistics
+import threading
+import time
+
+from flaskr import create_app
+from models import db
+
+# Sends concurrent requests to the question list with each pool profile in
+# PROFILES and reports throughput, latency and what the pool went through.
+# It only reads, but point it at a copy of the trivia database anyway:
+#
+#     TRIVIA_LOAD_TEST_DATABASE_URL=postgres://localhost:5432/trivia_test python load_test.py
+
+DATABASE_URL = os.environ.get('TRIVIA_LOAD_TEST_DATABASE_URL',
+                              'postgres://localhost:5432/trivia_test')
+
+PROFILES = [
+    # fewer connections than request threads, as with the library defaults
+    # under a busy gunicorn worker
+    ('starved', {'size': 2, 'max_overflow': 0, 'timeout': 2}),
+    # one connection per request thread, no overflow churn
+    ('tuned', {'size': 16, 'max_overflow': 4, 'timeout': 10})
+]
+
+
+def run(profile, threads=16, requests_per_thread=50, path='/questions?page=1'):
+    app = create_app(database_path=DATABASE_URL, pool=profile)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            try:
+                status = client.get(path).status_code
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(status)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        pool = db.engine.pool
+        stats = {
+            'requests/s': len(latencies) / elapsed,
+            'p50 ms': statistics.median(latencies) * 1000,
+            'p95 ms': sorted(latencies)[int(len(latencies) * 0.95)] * 1000,
+            'errors': len(errors),
+            'wait/checkout ms': pool.checkout_seconds / max(pool.checkouts, 1) * 1000,
+            'timeouts': pool.checkout_timeouts
+        }
+        db.engine.dispose()
+    return stats
+
+
+def main():
+    for name, profile in PROFILES:
+        stats = run(profile)
+        print(name.ljust(8) + '  '.join(f'{key} {value:.1f}' if isinstance(value, float)
+                                        else f'{key} {value}' for key, value in stats.items()))
+
+
+if __name__ == '__main__':
+    main()
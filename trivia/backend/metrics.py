@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('metrics_query_start', time.perf_counter())
+    if has_request_context() and g.get('metrics') is not None:
+        g.metrics['queries'] += 1
+        g.metrics['db_seconds'] += elapsed
+
+
+def record_serialization(elapsed):
+    if has_request_context() and g.get('metrics') is not None:
+        g.metrics['serialization_seconds'] += elapsed
+
+
+COUNTERS = [
+    ('requests_total', 'Requests handled.'),
+    ('request_queries_total', 'SQL statements executed while handling requests.'),
+    ('request_db_seconds_total', 'Time spent executing SQL statements.'),
+    ('request_serialization_seconds_total', 'Time spent rendering templates and encoding JSON.'),
+    ('request_seconds_total', 'Time spent handling requests.'),
+    ('response_bytes_total', 'Bytes sent in response bodies.')
+]
+
+
+'''
+Metrics
+    per-endpoint request telemetry for a Flask app
+
+    records, for every endpoint, the number of requests, SQL queries, time
+    spent in the database, time spent rendering templates or encoding JSON,
+    total request time and response bytes. The totals are served in the
+    Prometheus text format at METRICS_ENDPOINT (default /metrics, None to
+    disable). With METRICS_RESPONSE_HEADER set, or the environment variable
+    of that name set to true, each response also carries its own numbers
+    in Server-Timing and X-Query-Count headers. Other parts of the app can
+    add their own lines to the endpoint with add_collector.
+    EXAMPLE
+        app = Flask(__name__)
+        Metrics(app)
+'''
+class Metrics:
+    def __init__(self, app=None):
+        self.endpoints = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENDPOINT', '/metrics')
+        app.config.setdefault('METRICS_RESPONSE_HEADER',
+                              os.getenv('METRICS_RESPONSE_HEADER') == 'true')
+        self.response_header = app.config['METRICS_RESPONSE_HEADER']
+
+        app.before_request(self.start_request)
+        app.after_request(self.end_request)
+        if app.config['METRICS_ENDPOINT']:
+            app.add_url_rule(app.config['METRICS_ENDPOINT'], 'metrics', self.export)
+
+        class TimedTemplate(app.jinja_env.template_class):
+            def render(self, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return super().render(*args, **kwargs)
+                finally:
+                    record_serialization(time.perf_counter() - start)
+
+        class TimedJSONEncoder(app.json_encoder):
+            def encode(self, o):
+                start = time.perf_counter()
+                try:
+                    return super().encode(o)
+                finally:
+                    record_serialization(time.perf_counter() - start)
+
+        app.jinja_env.template_class = TimedTemplate
+        app.json_encoder = TimedJSONEncoder
+
+    def start_request(self):
+        g.metrics = {
+            'start': time.perf_counter(),
+            'queries': 0,
+            'db_seconds': 0.0,
+            'serialization_seconds': 0.0
+        }
+
+    def end_request(self, response):
+        current = g.get('metrics')
+        if current is None or request.endpoint == 'metrics':
+            return response
+
+        elapsed = time.perf_counter() - current['start']
+        size = response.calculate_content_length() or 0
+        with self._lock:
+            totals = self.endpoints.setdefault(request.endpoint or 'unknown',
+                                               dict.fromkeys((name for name, _ in COUNTERS), 0))
+            for name, value in (('requests_total', 1),
+                                ('request_queries_total', current['queries']),
+                                ('request_db_seconds_total', current['db_seconds']),
+                                ('request_serialization_seconds_total',
+                                 current['serialization_seconds']),
+                                ('request_seconds_total', elapsed),
+                                ('response_bytes_total', size)):
+                totals[name] += value
+
+        if self.response_header:
+            response.headers['X-Query-Count'] = str(current['queries'])
+            response.headers['Server-Timing'] = \
+                'db;dur={:.2f}, serialize;dur={:.2f}, total;dur={:.2f}'.format(
+                    current['db_seconds'] * 1000,
+                    current['serialization_seconds'] * 1000,
+                    elapsed * 1000)
+        return response
+
+    def add_collector(self, collect):
+        # `collect` is called on every scrape and returns Prometheus lines
+        self.collectors.append(collect)
+
+    def collect(self):
+        lines = []
+        with self._lock:
+            for name, description in COUNTERS:
+                lines.append(f'# HELP flask_{name} {description}')
+                lines.append(f'# TYPE flask_{name} counter')
+                for endpoint, totals in sorted(self.endpoints.items()):
+                    lines.append(f'flask_{name}{{endpoint="{endpoint}"}} {totals[name]}')
+        for collect in self.collectors:
+            lines.extend(collect())
+        return lines
+
+    def export(self):
+        return Response('\n'.join(self.collect()) + '\n',
+                        mimetype='text/plain; version=0.0.4')
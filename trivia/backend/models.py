@@ -1,7 +1,8 @@
 import os
-from sqlalchemy import Column, String, Integer, create_engine
+from sqlalchemy import Column, String, Integer, ForeignKey, create_engine
 from flask_sqlalchemy import SQLAlchemy
 import json
+from dbpool import engine_options, pool_profile, pool_metrics
 
 database_name = "trivia"
 database_path = "postgres://{}/{}".format('localhost:5432', database_name)
@@ -10,15 +11,24 @@ db = SQLAlchemy()
 
 '''
 setup_db(app)
-    binds a flask application and a SQLAlchemy service
+    binds a flask application and a SQLAlchemy service, with the connection
+    pool settings of `pool`, app.config or the environment (see dbpool)
 '''
-def setup_db(app, database_path=database_path):
+def setup_db(app, database_path=database_path, pool=None):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(pool_profile(app.config, pool))
     db.app = app
     db.init_app(app)
     db.create_all()
 
+'''
+db_pool_metrics()
+    Prometheus lines for the connection pool, for Metrics.add_collector
+'''
+def db_pool_metrics():
+    return pool_metrics(db.engine.pool)
+
 '''
 Question
 
@@ -29,7 +39,8 @@ class Question(db.Model):
   id = Column(Integer, primary_key=True)
   question = Column(String)
   answer = Column(String)
-  category = Column(String)
+  category = Column(Integer, ForeignKey('categories.id', onupdate='CASCADE',
+                                        ondelete='SET NULL'), index=True)
   difficulty = Column(Integer)
 
   def __init__(self, question, answer, category, difficulty):
@@ -48,6 +48,19 @@ class TriviaTestCase(unittest.TestCase):
         self.assertTrue(data['categories'])
         self.assertEqual(len(data['categories']), 6)
 
+    def test_invalidate_categories(self):
+        version = json.loads(self.client().get('/categories').data)['categories_version']
+        response = self.client().post('/categories/invalidate')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['success'], True)
+        self.assertEqual(data['categories_version'], version + 1)
+
+        data = json.loads(self.client().get('/categories').data)
+        self.assertEqual(data['categories_version'], version + 1)
+        self.assertEqual(len(data['categories']), 6)
+
     def test_get_paginated_questions(self):
         response = self.client().get('/questions')
         data = json.loads(response.data)
@@ -67,6 +80,29 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data['success'], False)
         self.assertEqual(data['message'], 'Resource not found')
 
+    def test_get_questions_with_cursor(self):
+        response = self.client().get('/questions?limit=5')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['questions']), 5)
+        self.assertTrue(data['next_cursor'])
+
+        response = self.client().get('/questions?limit=5&cursor={}'.format(data['next_cursor']))
+        next_data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(next_data['questions'][0]['id'], data['questions'][-1]['id'])
+        self.assertEqual(next_data['total_questions'], data['total_questions'])
+
+    def test_get_questions_error_invalid_cursor(self):
+        response = self.client().get('/questions?cursor=not-a-cursor')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['success'], False)
+        self.assertEqual(data['message'], 'Bad request')
+
     def test_delete_question(self):
         dummy_question_id = create_dummy_question()
 
@@ -148,6 +184,23 @@ class TriviaTestCase(unittest.TestCase):
         self.assertGreater(len(data['questions']), 0)
         self.assertEqual(data['current_category'], 'Sports')
 
+    def test_get_questions_by_category_total_follows_writes(self):
+        total = json.loads(self.client().get('/categories/6/questions').data)['total_questions']
+
+        response = self.client().post('/questions', json={
+            'question': 'Which sport is played at Wimbledon?',
+            'answer': 'Tennis',
+            'difficulty': 1,
+            'category': 6
+        })
+        question_id = json.loads(response.data)['question_created']
+        data = json.loads(self.client().get('/categories/6/questions').data)
+        self.assertEqual(data['total_questions'], total + 1)
+
+        self.client().delete('/questions/{}'.format(question_id))
+        data = json.loads(self.client().get('/categories/6/questions').data)
+        self.assertEqual(data['total_questions'], total)
+
     def test_get_questions_by_category_invalid_category_id(self):
         response = self.client().get('/categories/2000/questions')
         data = json.loads(response.data)
@@ -176,6 +229,35 @@ class TriviaTestCase(unittest.TestCase):
         self.assertNotEqual(data['question']['id'], 7)
         self.assertEqual(data['question']['category'], 6)
 
+    def test_play_quiz_questions_all_asked(self):
+        response = self.client().get('/categories/6/questions')
+        asked = [question['id'] for question in json.loads(response.data)['questions']]
+        request_data = {
+            'previous_questions': asked,
+            'quiz_category': {
+                'type': 'Sport',
+                'id': 6
+            }
+        }
+
+        response = self.client().post('/quizzes', json=request_data)
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['success'], True)
+        self.assertNotIn('question', data)
+
+    def test_metrics(self):
+        self.client().get('/categories')
+        response = self.client().get('/metrics')
+        body = response.data.decode('utf-8')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('flask_requests_total{endpoint="get_all_categories"} 1', body)
+        self.assertIn('flask_request_queries_total{endpoint="get_all_categories"}', body)
+        self.assertIn('flask_db_pool_checked_out 0', body)
+        self.assertIn('flask_db_pool_checkouts_total', body)
+
     def test_play_quiz_questions_no_data(self):
         response = self.client().post('/quizzes', json={})
         data = json.loads(response.data)